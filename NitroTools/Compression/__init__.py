@@ -1,5 +1,25 @@
-from .lz10 import decompress_lz10, decompress_raw_lz10, compress_lz10, compress_raw_lz10
-from .lz11 import decompress_lz11, decompress_raw_lz11, compress_lz11, compress_raw_lz11
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Pool
+from time import perf_counter
+from functools import partial
+from itertools import repeat
+import os
+from .lz10 import (
+    decompress_lz10,
+    decompress_raw_lz10,
+    compress_lz10,
+    compress_raw_lz10,
+    LZ10Decompressor,
+    LZ10Compressor,
+)
+from .lz11 import (
+    decompress_lz11,
+    decompress_raw_lz11,
+    compress_lz11,
+    compress_raw_lz11,
+    LZ11Decompressor,
+    LZ11Compressor,
+)
 from .rle import decompress_rle, decompress_raw_rle, compress_rle, compress_raw_rle
 from .huffman import (
     decompress_huffman4bits,
@@ -11,9 +31,40 @@ from .huffman import (
     compress_huffman8bits,
     compress_raw_huffman8bits,
 )
+from .blz import decompress_blz, compress_blz
+from .probe import probe, check_limits, DecompressionLimitError, COMPRESSION_MAGICS
+
+
+def decompress(
+    in_data: bytes,
+    code: str = None,
+    max_size: int = None,
+    max_ratio: float = None,
+    trial_size: int = None,
+):
+    """
+    Decompress the data, with the compression given by its header.
+
+    The limits are checked before the decompression starts (see check_limits), and a
+    DecompressionLimitError is raised when one of them isn't met. They are meant for
+    untrusted data, whose header can claim any size.
 
+    :params in_data: The compressed data.
+    :params code: The code of the compression, to skip the detection. BLZ has no header,
+        so "blz" data is only decompressed when asked.
+    :params max_size: The maximum decompressed size, in bytes.
+    :params max_ratio: The maximum ratio between the decompressed size and the size of the data.
+    :params trial_size: The number of bytes produced by a trial decode, before the real one.
+
+    :returns: A tuple (data, code).
+    """
+    if max_size is not None or max_ratio is not None or trial_size is not None:
+        check_limits(in_data, code, max_size, max_ratio, trial_size)
+    if code == "blz":
+        return decompress_blz(in_data), "blz"
+    if code is not None and COMPRESSION_MAGICS.get(in_data[0]) != code:
+        raise Exception(f"The data isn't compressed with {code}")
 
-def decompress(in_data: bytes):
     match in_data[0]:
         case 0x10:
             return decompress_lz10(in_data), "lz10"
@@ -41,5 +92,161 @@ def compress(in_data: bytes, code: "str"):
             return compress_huffman8bits(in_data)
         case "rle":
             return compress_rle(in_data)
+        case "blz":
+            return compress_blz(in_data)
         case _:
             raise Exception(f"Unknown compression code: {code}")
+
+
+# The codes of the codecs compress_best tries by default
+COMPRESSION_CODES = ("lz10", "lz11", "huff4", "huff8", "rle")
+
+
+def timed_compress(in_data: bytes, code: str):
+    """
+    Compress the data with the given codec, and measure the time it takes.
+
+    :returns: A tuple (data, seconds).
+    """
+    start = perf_counter()
+    out_data = compress(in_data, code)
+    return bytes(out_data), perf_counter() - start
+
+
+def try_timed_compress(in_data: bytes, code: str):
+    """
+    Same as timed_compress, but returns the exception instead of raising it.
+
+    :returns: A tuple (code, result), where result is the tuple of timed_compress or the exception.
+    """
+    try:
+        return code, timed_compress(in_data, code)
+    except Exception as e:
+        return code, e
+
+
+def compress_best(
+    in_data: bytes,
+    candidates: tuple[str] = COMPRESSION_CODES,
+    budget: int = None,
+    workers: int = None,
+):
+    """
+    Compress the data with several codecs at once, in a process pool, and keep the smallest output.
+    A codec that fails (e.g. a Huffman tree too wide to be stored) is skipped.
+
+    :params in_data: The data to compress.
+    :params candidates: The codes of the codecs to try. When outputs have the same size, the first code wins.
+    :params budget: If given, the first output of at most this many bytes is returned without waiting
+        for the other codecs, which are stopped.
+    :params workers: The number of processes. With 1, the codecs run one after another in this process.
+        Otherwise, the calling script must be guarded by if __name__ == "__main__" on the platforms
+        that spawn processes (Windows, macOS).
+
+    :returns: A tuple (data, code, report), where report maps the code of each codec that finished
+        to a tuple (size, seconds).
+    """
+    if not candidates:
+        raise Exception("No compression code to try")
+    in_data = bytes(in_data)
+    report = {}
+    results = {}
+    error = None
+
+    def done(code, result):
+        data, seconds = result
+        report[code] = (len(data), seconds)
+        results[code] = data
+        return budget is not None and len(data) <= budget
+
+    if workers == 1:
+        for code in candidates:
+            try:
+                if done(code, timed_compress(in_data, code)):
+                    break
+            except Exception as e:
+                error = e
+
+    else:
+        workers = workers or min(len(candidates), os.cpu_count() or 1)
+        # leaving the pool terminates its processes, which stops the codecs still running
+        # when the budget is met
+        with Pool(workers) as pool:
+            for code, result in pool.imap_unordered(
+                partial(try_timed_compress, in_data), candidates
+            ):
+                if isinstance(result, Exception):
+                    error = result
+                elif done(code, result):
+                    break
+
+    if not results:
+        raise error
+    code = min(
+        (code for code in candidates if code in results), key=lambda code: len(results[code])
+    )
+    return results[code], code, report
+
+
+def try_decompress(in_data: bytes, limits: dict = None):
+    """
+    Same as decompress, but returns the exception instead of raising it.
+    """
+    try:
+        return decompress(in_data, **(limits or {}))
+    except Exception as e:
+        return e
+
+
+def try_compress(in_data: bytes, code: str):
+    """
+    Same as compress, but returns the exception instead of raising it.
+    """
+    try:
+        return compress(in_data, code)
+    except Exception as e:
+        return e
+
+
+def map_items(func, iterables, workers: int, chunksize: int):
+    if workers == 1:
+        yield from map(func, *iterables)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(func, *iterables, chunksize=chunksize)
+
+
+def decompress_many(
+    iterable, workers: int = None, chunksize: int = 16, limits: dict = None
+):
+    """
+    Decompress many buffers in a process pool. The buffers are sent to the workers in chunks,
+    which keeps the cost of the dispatch low for small buffers.
+
+    :params iterable: The compressed buffers.
+    :params workers: The number of processes, all the CPUs by default. With 1, the buffers are
+        decompressed in this process.
+    :params chunksize: The number of buffers sent to a worker at once.
+    :params limits: The max_size, max_ratio and trial_size keyword arguments of decompress, if any.
+
+    :returns: A generator of the results, in the order of the input, as they are ready: a tuple
+        (data, code) like the one of decompress, or the exception raised by this buffer.
+    """
+    return map_items(try_decompress, (iterable, repeat(limits)), workers, chunksize)
+
+
+def compress_many(iterable, code: str, workers: int = None, chunksize: int = 16):
+    """
+    Compress many buffers with the same codec in a process pool. The buffers are sent to the
+    workers in chunks, which keeps the cost of the dispatch low for small buffers.
+
+    :params iterable: The buffers to compress.
+    :params code: The code of the codec.
+    :params workers: The number of processes, all the CPUs by default. With 1, the buffers are
+        compressed in this process.
+    :params chunksize: The number of buffers sent to a worker at once.
+
+    :returns: A generator of the results, in the order of the input, as they are ready: the
+        compressed data, or the exception raised by this buffer.
+    """
+    return map_items(try_compress, (iterable, repeat(code)), workers, chunksize)
@@ -0,0 +1,209 @@
+"""
+Backward LZ (BLZ), used on ARM9 binaries and overlays. The file is made of an uncompressed
+part, the compressed data, then a footer. The compressed data is read from its end, and the
+data is decompressed from the end of the output to its start, which lets it be decompressed
+in place: the output overwrites the compressed data once it has been read.
+
+The footer is 8 bytes long, and preceded by 0xFF padding bytes that align it to 4 bytes:
+    - the size of the compressed data and of the footer (24 bits), and the size of the footer (8 bits)
+    - the size of the output minus the size of the file (32 bits)
+A file whose last 4 bytes are 0 isn't compressed.
+"""
+
+from struct import pack
+from NitroTools.Compression.lz10 import FLAG_BITS
+
+
+class DecompressionError(ValueError):
+    pass
+
+
+# A back-reference copies 3 to 18 bytes, from 3 to 0x1002 bytes after them
+BLZ_MATCH_MIN = 3
+BLZ_MATCH_MAX = 0x12
+BLZ_DISP_MIN = 3
+BLZ_DISP_MAX = 0x1002
+
+BLZ_FOOTER_SIZE = 8
+
+
+def decompress_blz(in_data: bytes, in_place: bool = False) -> bytearray:
+    """
+    Decompress BLZ data.
+
+    :params in_data: The data to decompress.
+    :params in_place: If True, in_data must be a bytearray: it is extended and decompressed in place,
+        instead of being copied first.
+
+    :returns: The decompressed data.
+    """
+    if in_place and not isinstance(in_data, bytearray):
+        raise Exception(
+            f"Decompressing in place requires a bytearray, not {type(in_data).__name__}"
+        )
+    data = in_data if in_place else bytearray(in_data)
+    if len(data) < 4:
+        raise DecompressionError("Missing BLZ footer")
+
+    inc_len = int.from_bytes(data[-4:], "little")
+    if not inc_len:
+        del data[-4:]
+        return data
+
+    if len(data) < BLZ_FOOTER_SIZE:
+        raise DecompressionError("Missing BLZ footer")
+    footer_size = data[-5]
+    enc_len = int.from_bytes(data[-8:-5], "little")
+    if footer_size < BLZ_FOOTER_SIZE or not footer_size <= enc_len <= len(data):
+        raise DecompressionError("Invalid BLZ footer")
+
+    dec_len = len(data) - enc_len  # the size of the uncompressed part
+    in_pos = len(data) - footer_size
+    out_pos = len(data) + inc_len
+    decompressed_size = out_pos
+    data += bytes(inc_len)
+
+    try:
+        while out_pos > dec_len:
+            in_pos -= 1
+            if in_pos < dec_len:
+                raise IndexError
+            flags = data[in_pos]
+
+            for flag in FLAG_BITS:
+                if out_pos <= dec_len:
+                    break
+
+                if not flags & flag:
+                    in_pos -= 1
+                    out_pos -= 1
+                    if in_pos < dec_len:
+                        raise IndexError
+                    data[out_pos] = data[in_pos]
+
+                else:
+                    in_pos -= 2
+                    if in_pos < dec_len:
+                        raise IndexError
+                    sh = (data[in_pos + 1] << 8) | data[in_pos]
+                    count = min((sh >> 12) + BLZ_MATCH_MIN, out_pos - dec_len)
+                    disp = (sh & 0xFFF) + BLZ_DISP_MIN
+
+                    start = out_pos - count
+                    if start + disp + count > decompressed_size:
+                        raise DecompressionError("Back-reference past the end of the data")
+                    if disp >= count:
+                        data[start:out_pos] = data[start + disp : out_pos + disp]
+                    else:  # the reference overlaps the output, so it repeats with a period of disp
+                        pattern = data[out_pos : out_pos + disp]
+                        data[start:out_pos] = (pattern * (count // disp + 1))[-count:]
+                    out_pos = start
+
+                # the output must not overwrite compressed data that hasn't been read yet
+                if out_pos < in_pos:
+                    raise DecompressionError("The output overwrites the compressed data")
+
+    except IndexError:
+        raise DecompressionError("Unexpected end of the compressed data")
+
+    return data
+
+
+def find_blz_match(data: bytes, pos: int):
+    """
+    Find the longest back-reference for the bytes that end at pos, as BLZ goes from the end of
+    the data to its start. The copied bytes come after pos and can't overlap the ones they give.
+    When several matches have the same length, the closest one is returned.
+
+    :returns: A tuple (count, displacement), or None if there is no match of at least 3 bytes.
+    """
+    max_len = min(pos, BLZ_MATCH_MAX)
+    if max_len < BLZ_MATCH_MIN:
+        return None
+    end = pos + BLZ_DISP_MAX
+
+    # bytes.find returns the leftmost occurrence, that is the smallest displacement
+    length = BLZ_MATCH_MIN
+    start = data.find(data[pos - length : pos], pos, end)
+    if start < 0:
+        return None
+
+    while True:
+        # the match grows backwards, as long as it doesn't reach pos
+        while (
+            length < max_len
+            and start > pos
+            and data[start - 1] == data[pos - length - 1]
+        ):
+            start -= 1
+            length += 1
+        if length == max_len:
+            break
+        # only a farther occurrence of a longer needle can beat the current match
+        start_next = data.find(data[pos - length - 1 : pos], pos, end)
+        if start_next < 0:
+            break
+        start = start_next
+        length += 1
+
+    return length, start + length - pos
+
+
+def compress_blz(in_data: bytes) -> bytearray:
+    """
+    Compress data with BLZ, from its end to its start. The end of the compression, which is the
+    start of the data, is stored uncompressed when it doesn't compress well: the size of the file
+    is minimized, which also guarantees that the data can be decompressed in place.
+
+    Data that doesn't get smaller is stored as is, followed by a 0 footer.
+    """
+    raw_len = len(in_data)
+    # the compressed stream, in reading order: it is reversed at the end
+    pak = bytearray()
+    pos = raw_len
+
+    # the best place to stop the compression, and the size of the file there
+    best_pos = raw_len
+    best_pak_len = 0
+    best_size = raw_len
+
+    while pos > 0:
+        flag_pos = len(pak)
+        pak.append(0)
+
+        for flag in FLAG_BITS:
+            if pos <= 0:
+                break
+            match = find_blz_match(in_data, pos)
+            if match:
+                count, disp = match
+                sh = ((count - BLZ_MATCH_MIN) << 12) | (disp - BLZ_DISP_MIN)
+                pak[flag_pos] |= flag
+                pak.append(sh >> 8)
+                pak.append(sh & 0xFF)
+                pos -= count
+            else:
+                pos -= 1
+                pak.append(in_data[pos])
+
+            if len(pak) + pos < best_size:
+                best_size = len(pak) + pos
+                best_pos = pos
+                best_pak_len = len(pak)
+
+    aligned_size = (best_size + 3) & ~3
+    if not best_pak_len or aligned_size + BLZ_FOOTER_SIZE >= raw_len:
+        return bytearray(in_data) + bytes(4)
+
+    footer_size = BLZ_FOOTER_SIZE + aligned_size - best_size
+    out_data = bytearray(in_data[:best_pos])
+    del pak[best_pak_len:]
+    pak.reverse()
+    out_data += pak
+    out_data += b"\xff" * (aligned_size - best_size)
+    out_data += pack(
+        "<LL",
+        ((best_pak_len + footer_size) & 0xFFFFFF) | (footer_size << 24),
+        raw_len - aligned_size - BLZ_FOOTER_SIZE,
+    )
+    return out_data
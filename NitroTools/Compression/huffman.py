@@ -1,5 +1,8 @@
-from NitroTools.FileSystem import EndianBinaryStreamReader, EndianBinaryStreamWriter
+from NitroTools.FileSystem import EndianBinaryStreamReader
 from struct import pack
+from array import array
+from collections import Counter
+from heapq import heapify, heappop, heappush
 
 
 class DecompressionError(ValueError):
@@ -34,314 +37,257 @@ def decompress_raw_huffman8bits(in_data: bytes, decompressed_size: int):
     return decompress_raw_huffman(in_data, decompressed_size, 8)
 
 
-def decompress_raw_huffman(in_data: bytes, decompressed_size: int, num_bits: int):
-    out_data = bytearray(decompressed_size)
-    stream = EndianBinaryStreamReader(in_data)
-    mask = 0
-    nbits = 0
-    out_pos = 0
-    stream.seek((in_data[0] + 1) << 1)
-    pos = in_data[1]
-    N = len(in_data)
-
-    while out_pos < decompressed_size:
-        mask >>= 1
-        if mask == 0:
-            if stream.tell() + 3 > N:
-                break
-            code = stream.read_UInt32()
-            mask = 0x80_00_00_00
+def walk_tree(tree: bytes, node: int, byte: int) -> tuple[bytes, int]:
+    """
+    Walk the Huffman tree along the 8 bits of a byte, most significant bit first.
 
-        next = ((pos & 0x3F) + 1) << 1
-        next &= 0xFF_FF_FF_FF
+    :params tree: The compressed data, which starts with the tree.
+    :params node: The offset of the node the walk starts from.
+    :params byte: The 8 bits to follow.
 
-        if code & mask == 0:
-            ch = pos & 0x80
-            pos = in_data[next]
+    :returns: A tuple (symbols, node): the symbols decoded on the way, and the node the walk ends on.
+    """
+    symbols = bytearray()
+    for shift in range(7, -1, -1):
+        value = tree[node]
+        child = (node & ~1) + ((value & HUF_NEXT) << 1) + 2
+        if (byte >> shift) & 1 == 0:
+            leaf = value & HUF_LCHAR
         else:
-            ch = pos & 0x40
-            pos = in_data[next + 1]
+            leaf = value & HUF_RCHAR
+            child += 1
+        if leaf:
+            symbols.append(tree[child])
+            node = 1
+        else:
+            node = child
+    return bytes(symbols), node
 
-        if ch:
-            out_data[out_pos] |= pos << nbits
-            nbits = (nbits + num_bits) & 7
-            if nbits == 0:
-                out_pos += 1
-            pos = in_data[1]
-            next = 0
 
+def decompress_raw_huffman(in_data: bytes, decompressed_size: int, num_bits: int):
+    """
+    Decode a Huffman bitstream a byte at a time. For each (node, byte) couple met, a walk
+    through the tree gives the symbols the byte decodes to and the node it ends on; the
+    result is kept in a lookup table, so each couple is only walked once. Codes of any
+    length are handled, since a walk can end in the middle of a code.
+    """
+    symbol_count = decompressed_size * 8 // num_bits
+    if not in_data:
+        raise DecompressionError("Missing Huffman tree")
+    start = (in_data[0] + 1) << 1
+    word_count = (len(in_data) - start) >> 2
+
+    # The bitstream is made of 32 bits little endian words, read from the most significant
+    # bit: byteswapped words give the bytes in reading order.
+    # frombytes, since array() would make an item of each byte of a memoryview
+    words = array("I")
+    words.frombytes(in_data[start : start + (word_count << 2)])
+    words.byteswap()
+
+    table = {}
+    symbols = bytearray()
+    node = 1
+    try:
+        for byte in words.tobytes():
+            key = (node << 8) | byte
+            entry = table.get(key)
+            if entry is None:
+                entry = table[key] = walk_tree(in_data, node, byte)
+            decoded, node = entry
+            symbols += decoded
+            if len(symbols) >= symbol_count:
+                break
+    except IndexError:
+        raise DecompressionError("Invalid Huffman tree")
+
+    del symbols[symbol_count:]
+    if num_bits == 8:
+        out_data = symbols
+    else:
+        # pixels are stored low nibble first
+        out_data = bytearray(
+            low | (high << 4) for low, high in zip(symbols[0::2], symbols[1::2])
+        )
+        if len(symbols) & 1:
+            out_data.append(symbols[-1])
+
+    # the output is zero padded if the bitstream ends early
+    out_data += bytes(decompressed_size - len(out_data))
     return out_data
 
 
-class HuffmanNode:
-    symbol: int
-    weight: int
-    leafs = 1
-    parent = None
-    left = None
-    right = None
-
-
-class HuffmanCode:
-    nbits: int
-    codework: int
-
-
 HUF_NEXT = 0x3F
 HUF_LCHAR = 0x80
 HUF_RCHAR = 0x40
 
-
-def compress_raw_huffman(in_data: bytes, num_bits: int):
-
-    def CreateCodeBranch(root: HuffmanNode, p: int, q: int):
-        if root.leafs <= HUF_NEXT + 1:
-            stack: list[HuffmanNode] = [None] * (2 * root.leafs)
-            s = r = 0
-            stack[r] = root
-            r += 1
-
-            while s < r:
-                node = stack[s]
-                s += 1
-                if node.leafs == 1:
-                    if s == 1:
-                        code_tree[p] = node.symbol
-                        code_mask[p] = 0xFF
-                    else:
-                        code_tree[q] = node.symbol
-                        code_mask[q] = 0xFF
-                        q += 1
-
-                else:
-                    mask = 0
-                    if node.left.leafs == 1:
-                        mask |= HUF_LCHAR
-                    if node.right.leafs == 1:
-                        mask |= HUF_RCHAR
-                    if s == 1:
-                        code_tree[p] = (r - s) >> 1
-                        code_mask[p] = mask
-                    else:
-                        code_tree[q] = (r - s) >> 1
-                        code_mask[q] = mask
-                        q += 1
-                    stack[r] = node.left
-                    stack[r + 1] = node.right
-                    r += 2
+# Longer codes are avoided by flattening the symbol frequencies
+HUF_MAX_CODE_LENGTH = 16
+
+# Number of bytes encoded at once
+HUF_ENCODE_CHUNK = 0x10000
+
+
+def build_huffman_tree(freqs: list[int]):
+    """
+    Build a Huffman tree with a heap. The tree is stored in flat arrays: nodes 0 to
+    len(freqs) - 1 are the leaves (node i holds symbol i), and the next ones are the
+    internal nodes, the last one being the root.
+
+    Symbols with a frequency of 0 are left out of the tree, but at least two leaves are kept,
+    since the root can't be a leaf.
+
+    :params freqs: The frequency of each symbol.
+
+    :returns: A tuple (left, right, leafs, root): the children and the leaf count of each node
+        (left and right are -1 for leaves), and the index of the root.
+    """
+    freqs = list(freqs)
+    missing = 2 - sum(1 for freq in freqs if freq)
+    for symbol in range(len(freqs)):
+        if missing <= 0:
+            break
+        if not freqs[symbol]:
+            freqs[symbol] = 1
+            missing -= 1
+
+    node_count = len(freqs)
+    left = [-1] * node_count
+    right = [-1] * node_count
+    leafs = [1] * node_count
+    heap = [(freq, symbol) for symbol, freq in enumerate(freqs) if freq]
+    heapify(heap)
+
+    while len(heap) > 1:
+        weight0, node0 = heappop(heap)
+        weight1, node1 = heappop(heap)
+        left.append(node0)
+        right.append(node1)
+        leafs.append(leafs[node0] + leafs[node1])
+        heappush(heap, (weight0 + weight1, node_count))
+        node_count += 1
+
+    return left, right, leafs, node_count - 1
+
+
+def huffman_codes(left: list[int], right: list[int], root: int) -> dict[int, str]:
+    """
+    Returns the code of each leaf of the tree, as a string of "0" and "1".
+    """
+    codes = {}
+    stack = [(root, "")]
+    while stack:
+        node, code = stack.pop()
+        if left[node] < 0:
+            codes[node] = code
         else:
-            mask = 0
-            if root.left.leafs == 1:
-                mask |= HUF_LCHAR
-            if root.right.leafs == 1:
-                mask |= HUF_RCHAR
-            code_tree[p] = 0
-            code_mask[p] = mask
-            if root.left.leafs <= root.right.leafs:
-                l_leafs = CreateCodeBranch(root.left, q, q + 2)
-                r_leafs = CreateCodeBranch(root.right, q + 1, q + (l_leafs << 1))
-                code_tree[q + 1] = l_leafs - 1
-            else:
-                r_leafs = CreateCodeBranch(root.right, q + 1, q + 2)
-                l_leafs = CreateCodeBranch(root.left, q, q + (r_leafs << 1))
-                code_tree[q] = r_leafs - 1
-        return root.leafs
+            stack.append((left[node], code + "0"))
+            stack.append((right[node], code + "1"))
+    return codes
+
+
+def layout_huffman_tree(left: list[int], right: list[int], leafs: list[int], root: int):
+    """
+    Serialize the tree in the format of the NDS BIOS: a byte with the size of the tree, the root,
+    then pairs of children. An internal node stores the offset to its children pair (in pairs, minus 1)
+    on 6 bits, and flags telling which children are leaves.
+
+    The children of a node can't be more than 64 pairs after it. Pairs are placed depth first,
+    descending into the smallest subtree first, which keeps few nodes waiting for their children.
+    When a waiting node is about to run out of room, its children are placed first.
+
+    :returns: The tree, as a bytearray.
+    """
+    tree = bytearray(2)
+    address = {root: 1}
+    waiting = [root]
+    slot = 1
+
+    while waiting:
+        # deadline of a node: the last slot its children can go to
+        node = waiting[-1]
+        for rank, other in enumerate(waiting[:-1]):
+            if (address[other] >> 1) + HUF_NEXT + 1 < slot + 1 + rank:
+                node = waiting[0]
+                break
+        waiting.remove(node)
+
+        offset = slot - (address[node] >> 1) - 1
+        if offset > HUF_NEXT:
+            raise Exception("The Huffman tree is too wide to be stored")
+
+        children = (left[node], right[node])
+        flags = offset
+        tree += bytes(2)
+        for idx, child in enumerate(children):
+            address[child] = (slot << 1) + idx
+            if left[child] < 0:
+                flags |= HUF_LCHAR >> idx
+                tree[address[child]] = child
+        tree[address[node]] = flags
+
+        # the smallest subtree ends at the top of the stack
+        internal = [child for child in children if left[child] >= 0]
+        internal.sort(key=leafs.__getitem__, reverse=True)
+        waiting += internal
+        slot += 1
+
+    # the bitstream that follows must be aligned to 4 bytes
+    if len(tree) & 3:
+        tree += bytes(2)
+    tree[0] = (len(tree) >> 1) - 1
+    return tree
 
+
+def compress_raw_huffman(in_data: bytes, num_bits: int):
     max_symbols = 1 << num_bits
+    byte_counts = Counter(in_data)
     freqs = [0] * max_symbols
-
-    for byte in in_data:
-        for nbits in range(8, 0, -num_bits):
-            freqs[byte >> (8 - nbits)] += 1
-            byte = (byte << nbits) & 0xFF
-
-    num_leafs = 0
-    for elem in freqs:
-        if elem:
-            num_leafs += 1
-
-    if num_leafs < 2:
-        if num_leafs == 1:
-            pass
-
-        num_leafs += 1
-        while num_leafs < 2:
-            for i in range(max_symbols):
-                if not freqs[i]:
-                    freqs[i] = 2
-                    break
-            num_leafs += 1
-
-    num_nodes = (num_leafs << 1) - 1
-    tree = [HuffmanNode()] * num_nodes
-    num_node = 0
-    for i in range(max_symbols):
-        if freqs[i]:
-            node = HuffmanNode()
-            node.symbol = i
-            node.weight = freqs[i]
-            node.leafs = 1
-            tree[num_node] = node
-            num_node += 1
-
-    while num_node < num_nodes:
-        left = None
-        right = None
-        lweight = rweight = 0
-        for i in range(num_node):
-            if tree[i].parent is None:
-                if not lweight or tree[i].weight < lweight:
-                    rweight = lweight
-                    right = left
-                    lweight = tree[i].weight
-                    left = tree[i]
-
-                elif not rweight or tree[i].weight < rweight:
-                    rweight = tree[i].weight
-                    right = tree[i]
-
-        node = HuffmanNode()
-        node.symbol = num_node - num_leafs + max_symbols
-        node.weight = left.weight + right.weight
-        node.leafs = left.leafs + right.leafs
-        node.parent = None
-        node.left = left
-        node.right = right
-        node.left.parent = node
-        node.right.parent = node
-        tree[num_node] = node
-        num_node += 1
-
-    max_nodes = (((num_leafs - 1) | 1) + 1) << 1
-    code_tree = [0] * max_nodes
-    code_mask = [0] * max_nodes
-
-    code_tree[0] = (num_leafs - 1) | 1
-    i = 0
-
-    CreateCodeBranch(tree[num_nodes - 1], i + 1, i + 2)
-
-    max = (code_tree[0] + 1) << 1
-
-    i = 1
-    while i < max:
-        if (code_mask[i] != 0xFF) and (code_tree[i] > HUF_NEXT):
-            if (i & 1) and (code_tree[i - 1] == HUF_NEXT):
-                i -= 1
-                inc = 1
-            elif (not (i & 1)) and (code_tree[i + 1] == HUF_NEXT):
-                i += 1
-                inc = 1
-            else:
-                inc = code_tree[i] - HUF_NEXT
-
-            n1 = (i >> 1) + 1 + code_tree[i]
-            n0 = n1 - inc
-
-            l1 = n1 << 1
-            l0 = n0 << 1
-
-            tmp0 = code_tree[l1 : l1 + 2]
-            tmp1 = code_mask[l1 : l1 + 2]
-
-            for j in range(l1, l0, -2):
-                code_tree[j : j + 2] = code_tree[j - 2 : j]
-                code_mask[j : j + 2] = code_mask[j - 2 : j]
-
-            code_tree[l0 : l0 + 2] = tmp0
-            code_mask[l0 : l0 + 2] = tmp1
-
-            code_tree[i] -= inc
-
-            for j in range(i + 1, l0):
-                if code_mask[j] != 0xFF:
-                    k = (j >> 1) + 1 + code_tree[j]
-                    if k >= n0 and k < n1:
-                        code_tree[j] += 1
-
-            if code_mask[l0] != 0xFF:
-                code_tree[l0] += inc
-            if code_mask[l0 + 1] != 0xFF:
-                code_tree[l0 + 1] += inc
-
-            for j in range(l0 + 2, l1 + 2):
-                if code_mask[j] != 0xFF:
-                    k = (j >> 1) + 1 + code_tree[j]
-                    if k > n1:
-                        code_tree[j] -= 1
-
-            i = (i | 1) - 2
-        i += 1
-
-    i = (code_tree[0] + 1) << 1
-    i -= 1
-    while i:
-        if code_mask[i] != 0xFF:
-            code_tree[i] |= code_mask[i]
-        i -= 1
-
-    codes: list[HuffmanCode] = [None] * max_symbols
-    scode = [0] * 100
-
-    for i in range(num_leafs):
-        node = tree[i]
-        symbol = node.symbol
-        nbits = 0
-        while node.parent is not None:
-            if node.parent.left == node:
-                scode[nbits] = 0
-            else:
-                scode[nbits] = 1
-            nbits += 1
-            node = node.parent
-
-        maxbytes = (nbits + 7) >> 3
-        code = HuffmanCode()
-        codes[symbol] = code
-        code.nbits = nbits
-        code.codework = [None] * maxbytes
-        for j in range(maxbytes):
-            code.codework[j] = 0
-        mask = 0x80
-        j = 0
-        for nbit in range(nbits, 0, -1):
-            if scode[nbit - 1]:
-                code.codework[j] |= mask
-            mask >>= 1
-            if not mask:
-                mask = 0x80
-                j += 1
-
-    length = (code_tree[0] + 1) << 1
-    out = EndianBinaryStreamWriter()
-    for i in range(length):
-        out.write_UInt8(code_tree[i] % 256)
-    mask4 = 0
-    pk4 = None
-    for byte in in_data:
-        for nbits in range(8, 0, -num_bits):
-            code = codes[byte & ((1 << num_bits) - 1)]
-            length = code.nbits
-            cwork = code.codework
-            cwork_idx = 0
-            mask = 0x80
-            for _ in range(length, 0, -1):
-                mask4 >>= 1
-                if not mask4:
-                    if pk4 is not None:
-                        out.write_UInt32(pk4)
-                    mask4 = 0x80_00_00_00
-                    pk4 = 0
-                if cwork[cwork_idx] & mask:
-                    pk4 |= mask4
-                mask >>= 1
-                if not mask:
-                    mask = 0x80
-                    cwork_idx += 1
-            byte >>= num_bits
-
-    out.write_UInt32(pk4)
-    return out.getvalue()
+    for byte, count in byte_counts.items():
+        if num_bits == 8:
+            freqs[byte] += count
+        else:
+            freqs[byte & 0xF] += count
+            freqs[byte >> 4] += count
+
+    while True:
+        left, right, leafs, root = build_huffman_tree(freqs)
+        codes = huffman_codes(left, right, root)
+        if max(len(code) for code in codes.values()) <= HUF_MAX_CODE_LENGTH:
+            break
+        freqs = [1 + (freq >> 1) if freq else 0 for freq in freqs]
+
+    # the code of each byte value: in 4 bits mode, the low nibble comes first
+    if num_bits == 8:
+        byte_codes = [codes.get(byte, "") for byte in range(256)]
+    else:
+        byte_codes = [
+            codes.get(byte & 0xF, "") + codes.get(byte >> 4, "") for byte in range(256)
+        ]
+
+    out = layout_huffman_tree(left, right, leafs, root)
+    bits = ""
+    for pos in range(0, len(in_data), HUF_ENCODE_CHUNK):
+        bits += "".join(map(byte_codes.__getitem__, in_data[pos : pos + HUF_ENCODE_CHUNK]))
+        word_bits = len(bits) & ~31
+        out += pack_bits(bits[:word_bits])
+        bits = bits[word_bits:]
+
+    if bits:
+        out += pack_bits(bits.ljust((len(bits) + 31) & ~31, "0"))
+
+    return out
+
+
+def pack_bits(bits: str) -> bytes:
+    """
+    Pack a string of "0" and "1", whose length is a multiple of 32, into 32 bits little endian
+    words, filled from the most significant bit.
+    """
+    if not bits:
+        return b""
+    words = array("I", int(bits, 2).to_bytes(len(bits) >> 3, "big"))
+    words.byteswap()
+    return words.tobytes()
 
 
 def compress_raw_huffman4bits(in_data: bytes):
@@ -26,50 +26,70 @@ from struct import pack
 from collections import defaultdict
 from operator import itemgetter
 from NitroTools.FileSystem import EndianBinaryStreamReader
+from NitroTools.Compression.matchfinder import (
+    MatchFinder,
+    GREEDY,
+    LAZY,
+    OPTIMAL,
+    lazy_parse,
+    optimal_parse,
+)
+from NitroTools.Compression.lzstream import LZDecompressor, LZCompressor
 
 
 class DecompressionError(ValueError):
     pass
 
 
-def get_bits(byte: int):
-    yield (byte >> 7) & 1
-    yield (byte >> 6) & 1
-    yield (byte >> 5) & 1
-    yield (byte >> 4) & 1
-    yield (byte >> 3) & 1
-    yield (byte >> 2) & 1
-    yield (byte >> 1) & 1
-    yield byte & 1
+FLAG_BITS = (0x80, 0x40, 0x20, 0x10, 0x08, 0x04, 0x02, 0x01)
 
 
 def decompress_raw_lz10(in_data: bytes, decompressed_size: int):
     disp_extra = 1
-    out_data = bytearray()
-    stream = EndianBinaryStreamReader(in_data, endianness="big")
-
-    while len(out_data) < decompressed_size:
-
-        for flag in get_bits(stream.read_UInt8()):
-
-            if flag == 0:
-                out_data.append(stream.read_UInt8())
-
-            elif flag == 1:
-                sh = stream.read_UInt16()
-                count = (sh >> 0xC) + 3
-                disp = (sh & 0xFFF) + disp_extra
-
-                for _ in range(count):
-                    out_data.append(out_data[-disp])
-            else:
-                raise ValueError(flag)
-
-            if decompressed_size <= len(out_data):
-                break
-
-    if len(out_data) != decompressed_size:
-        raise DecompressionError("Decompressed size does not match the expected size")
+    out_data = bytearray(decompressed_size)
+    out_pos = 0
+    in_pos = 0
+
+    try:
+        while out_pos < decompressed_size:
+            flags = in_data[in_pos]
+            in_pos += 1
+
+            for flag in FLAG_BITS:
+
+                if not flags & flag:
+                    out_data[out_pos] = in_data[in_pos]
+                    in_pos += 1
+                    out_pos += 1
+
+                else:
+                    sh = (in_data[in_pos] << 8) | in_data[in_pos + 1]
+                    in_pos += 2
+                    count = (sh >> 0xC) + 3
+                    disp = (sh & 0xFFF) + disp_extra
+
+                    start = out_pos - disp
+                    end = out_pos + count
+                    if start < 0:
+                        raise DecompressionError("Back-reference before the start of the data")
+                    if end > decompressed_size:
+                        raise DecompressionError(
+                            "Decompressed size does not match the expected size"
+                        )
+
+                    if disp >= count:
+                        out_data[out_pos:end] = out_data[start : start + count]
+                    else:  # the reference overlaps the output, so it repeats with a period of disp
+                        out_data[out_pos:end] = (out_data[start:out_pos] * (count // disp + 1))[
+                            :count
+                        ]
+                    out_pos = end
+
+                if decompressed_size <= out_pos:
+                    break
+
+    except IndexError:
+        raise DecompressionError("Unexpected end of the compressed data")
 
     return out_data
 
@@ -84,6 +104,21 @@ def decompress_lz10(in_data: bytes) -> bytearray:
     return decompress_raw_lz10(in_data[4:], decompressed_size)
 
 
+class LZ10Decompressor(LZDecompressor):
+    """
+    Incremental LZ10 decompressor, see LZDecompressor.
+    """
+
+    magic = 0x10
+    error = DecompressionError
+
+    def read_reference(self, buf: bytearray, pos: int):
+        if pos + 2 > len(buf):
+            return None
+        sh = (buf[pos] << 8) | buf[pos + 1]
+        return (sh >> 0xC) + 3, (sh & 0xFFF) + 1, pos + 2
+
+
 class SlidingWindow:
     # The size of the sliding window
     size = 4096
@@ -185,6 +220,13 @@ class NLZ10Window(SlidingWindow):
     match_max = 3 + 0xF
 
 
+class NLZ10MatchFinder(MatchFinder):
+    size = 4096
+
+    match_min = 3
+    match_max = 3 + 0xF
+
+
 def packflags(flags):
     n = 0
     for i in range(8):
@@ -208,7 +250,7 @@ def chunkit(it, n):
         yield buf
 
 
-def _compress(in_data: bytes, windowclass=NLZ10Window):
+def _compress(in_data: bytes, windowclass=NLZ10MatchFinder):
     """Generates a stream of tokens. Either a byte (int) or a tuple of (count,
     displacement)."""
 
@@ -231,36 +273,76 @@ def _compress(in_data: bytes, windowclass=NLZ10Window):
             i += 1
 
 
-def compress_raw_lz10(in_data: bytes):
+def match_cost(count: int) -> int:
+    """Size in bits of a match token, including its flag bit."""
+    return 17
+
+
+def _tokenize(in_data: bytes, windowclass, level: int):
+    if level == GREEDY:
+        return _compress(in_data, windowclass)
+    elif level == LAZY:
+        return lazy_parse(in_data, windowclass)
+    elif level == OPTIMAL:
+        return optimal_parse(in_data, windowclass, match_cost)
+    raise ValueError(f"Unknown compression level: {level}")
+
+
+def pack_tokens(tokens: list) -> bytearray:
+    """Packs up to 8 tokens, preceded by their flag byte."""
+    flags = [type(t) == tuple for t in tokens]
+    out = bytearray(pack(">B", packflags(flags)))
+
+    for t in tokens:
+        if type(t) == tuple:
+            count, disp = t
+            count -= 3
+            disp = (-disp) - 1
+            assert 0 <= disp < 4096
+            sh = (count << 12) | disp
+            out += pack(">H", sh)
+        else:
+            out += pack(">B", t)
+
+    return out
+
+
+def compress_raw_lz10(
+    in_data: bytes, windowclass=NLZ10MatchFinder, level: int = GREEDY
+):
     out = bytearray()
     # body
-    length = 0
-    for tokens in chunkit(_compress(in_data), 8):
-        flags = [type(t) == tuple for t in tokens]
-        out += pack(">B", packflags(flags))
-
-        for t in tokens:
-            if type(t) == tuple:
-                count, disp = t
-                count -= 3
-                disp = (-disp) - 1
-                assert 0 <= disp < 4096
-                sh = (count << 12) | disp
-                out += pack(">H", sh)
-            else:
-                out += pack(">B", t)
+    for tokens in chunkit(_tokenize(in_data, windowclass, level), 8):
+        out += pack_tokens(tokens)
 
-        length += 1
-        length += sum(2 if f else 1 for f in flags)
-
-    #  padding = 4 - (length % 4 or 4)
+    #  padding = 4 - (len(out) % 4 or 4)
     # if padding:
     #    out += (b'\xff' * padding)
 
     return out
 
 
-def compress_lz10(in_data: bytes):
+def compress_lz10(in_data: bytes, level: int = GREEDY):
+    """
+    Compress data with LZ10.
+
+    :params in_data: The data to compress.
+    :params level: GREEDY (1) always takes the longest match, LAZY (2) defers a match when the next
+        position has a longer one, OPTIMAL (3) searches the smallest token stream. Higher levels give
+        smaller outputs but take longer.
+    """
     return bytearray(pack("<L", (len(in_data) << 8) + 0x10)) + compress_raw_lz10(
-        in_data
+        in_data, level=level
     )
+
+
+class LZ10Compressor(LZCompressor):
+    """
+    Incremental LZ10 compressor, see LZCompressor. The output is the same as compress_lz10.
+    """
+
+    magic = 0x10
+    finderclass = NLZ10MatchFinder
+
+    def pack_tokens(self, tokens: list) -> bytearray:
+        return pack_tokens(tokens)
@@ -26,65 +26,90 @@ from struct import pack
 from collections import defaultdict
 from operator import itemgetter
 from NitroTools.FileSystem import EndianBinaryStreamReader
+from NitroTools.Compression.matchfinder import (
+    MatchFinder,
+    GREEDY,
+    LAZY,
+    OPTIMAL,
+    lazy_parse,
+    optimal_parse,
+)
+from NitroTools.Compression.lzstream import LZDecompressor, LZCompressor
 
 
 class DecompressionError(ValueError):
     pass
 
 
-def get_bits(byte: int):
-    yield (byte >> 7) & 1
-    yield (byte >> 6) & 1
-    yield (byte >> 5) & 1
-    yield (byte >> 4) & 1
-    yield (byte >> 3) & 1
-    yield (byte >> 2) & 1
-    yield (byte >> 1) & 1
-    yield byte & 1
+FLAG_BITS = (0x80, 0x40, 0x20, 0x10, 0x08, 0x04, 0x02, 0x01)
 
 
 def decompress_raw_lz11(in_data: bytes, decompressed_size: int):
-    out_data = bytearray()
-    stream = EndianBinaryStreamReader(in_data, endianness="big")
+    out_data = bytearray(decompressed_size)
+    out_pos = 0
+    in_pos = 0
 
-    while len(out_data) < decompressed_size:
+    try:
+        while out_pos < decompressed_size:
+            flags = in_data[in_pos]
+            in_pos += 1
 
-        for flag in get_bits(stream.read_UInt8()):
+            for flag in FLAG_BITS:
 
-            if flag == 0:
-                out_data.append(stream.read_UInt8())
-
-            elif flag == 1:
-                info = stream.read_UInt8()
-                indicator = info >> 4
-
-                if indicator == 0:
-                    count = info << 4
-                    info = stream.read_UInt8()
-                    count += (info >> 4) + 0x11
-
-                elif indicator == 1:
-                    count = ((info & 0xF) << 12) + (stream.read_UInt8() << 4)
-                    info = stream.read_UInt8()
-                    count += (info >> 4) + 0x111
+                if not flags & flag:
+                    out_data[out_pos] = in_data[in_pos]
+                    in_pos += 1
+                    out_pos += 1
 
                 else:
-                    count = indicator + 1
-
-                disp = ((info & 0xF) << 8) + stream.read_UInt8()
-                disp += 1
-
-                for _ in range(count):
-                    out_data.append(out_data[-disp])
-
-            else:
-                raise ValueError(flag)
-
-            if decompressed_size <= len(out_data):
-                break
-
-    if len(out_data) != decompressed_size:
-        raise DecompressionError("Decompressed size does not match the expected size")
+                    info = in_data[in_pos]
+                    indicator = info >> 4
+
+                    if indicator == 0:
+                        count = (info << 4) + (in_data[in_pos + 1] >> 4) + 0x11
+                        info = in_data[in_pos + 1]
+                        in_pos += 2
+
+                    elif indicator == 1:
+                        count = (
+                            ((info & 0xF) << 12)
+                            + (in_data[in_pos + 1] << 4)
+                            + (in_data[in_pos + 2] >> 4)
+                            + 0x111
+                        )
+                        info = in_data[in_pos + 2]
+                        in_pos += 3
+
+                    else:
+                        count = indicator + 1
+                        in_pos += 1
+
+                    disp = ((info & 0xF) << 8) + in_data[in_pos]
+                    disp += 1
+                    in_pos += 1
+
+                    start = out_pos - disp
+                    end = out_pos + count
+                    if start < 0:
+                        raise DecompressionError("Back-reference before the start of the data")
+                    if end > decompressed_size:
+                        raise DecompressionError(
+                            "Decompressed size does not match the expected size"
+                        )
+
+                    if disp >= count:
+                        out_data[out_pos:end] = out_data[start : start + count]
+                    else:  # the reference overlaps the output, so it repeats with a period of disp
+                        out_data[out_pos:end] = (out_data[start:out_pos] * (count // disp + 1))[
+                            :count
+                        ]
+                    out_pos = end
+
+                if decompressed_size <= out_pos:
+                    break
+
+    except IndexError:
+        raise DecompressionError("Unexpected end of the compressed data")
 
     return out_data
 
@@ -99,6 +124,44 @@ def decompress_lz11(in_data: bytes) -> bytearray:
     return decompress_raw_lz11(in_data[4:], decompressed_size)
 
 
+class LZ11Decompressor(LZDecompressor):
+    """
+    Incremental LZ11 decompressor, see LZDecompressor.
+    """
+
+    magic = 0x11
+    error = DecompressionError
+
+    def read_reference(self, buf: bytearray, pos: int):
+        if pos >= len(buf):
+            return None
+        info = buf[pos]
+        indicator = info >> 4
+
+        if indicator == 0:
+            if pos + 3 > len(buf):
+                return None
+            count = (info << 4) + (buf[pos + 1] >> 4) + 0x11
+            info = buf[pos + 1]
+            pos += 2
+
+        elif indicator == 1:
+            if pos + 4 > len(buf):
+                return None
+            count = ((info & 0xF) << 12) + (buf[pos + 1] << 4) + (buf[pos + 2] >> 4) + 0x111
+            info = buf[pos + 2]
+            pos += 3
+
+        else:
+            if pos + 2 > len(buf):
+                return None
+            count = indicator + 1
+            pos += 1
+
+        disp = ((info & 0xF) << 8) + buf[pos] + 1
+        return count, disp, pos + 1
+
+
 class SlidingWindow:
     # The size of the sliding window
     size = 4096
@@ -201,6 +264,13 @@ class NLZ11Window(SlidingWindow):
     match_max = 0x111 + 0xFFFF
 
 
+class NLZ11MatchFinder(MatchFinder):
+    size = 4096
+
+    match_min = 3
+    match_max = 0x111 + 0xFFFF
+
+
 def packflags(flags):
     n = 0
     for i in range(8):
@@ -224,7 +294,7 @@ def chunkit(it, n):
         yield buf
 
 
-def _compress(in_data: bytes, windowclass=NLZ11Window):
+def _compress(in_data: bytes, windowclass=NLZ11MatchFinder):
     """Generates a stream of tokens. Either a byte (int) or a tuple of (count,
     displacement)."""
 
@@ -247,54 +317,99 @@ def _compress(in_data: bytes, windowclass=NLZ11Window):
             i += 1
 
 
-def compress_raw_lz11(in_data: bytes):
+def match_cost(count: int) -> int:
+    """Size in bits of a match token, including its flag bit."""
+    if count <= 1 + 0xF:
+        return 17
+    elif count <= 0x11 + 0xFF:
+        return 25
+    return 33
+
+
+def _tokenize(in_data: bytes, windowclass, level: int):
+    if level == GREEDY:
+        return _compress(in_data, windowclass)
+    elif level == LAZY:
+        return lazy_parse(in_data, windowclass)
+    elif level == OPTIMAL:
+        return optimal_parse(in_data, windowclass, match_cost, nice_length=0x111)
+    raise ValueError(f"Unknown compression level: {level}")
+
+
+def pack_tokens(tokens: list) -> bytearray:
+    """Packs up to 8 tokens, preceded by their flag byte."""
+    flags = [type(t) == tuple for t in tokens]
+    out = bytearray(pack(">B", packflags(flags)))
+
+    for t in tokens:
+        if type(t) == tuple:
+            count, disp = t
+            disp = (-disp) - 1
+            # if disp == 282:
+            #    raise Exception
+            assert 0 <= disp <= 0xFFF
+            if count <= 1 + 0xF:
+                count -= 1
+                assert 2 <= count <= 0xF
+                sh = (count << 12) | disp
+                out += pack(">H", sh)
+            elif count <= 0x11 + 0xFF:
+                count -= 0x11
+                assert 0 <= count <= 0xFF
+                b = count >> 4
+                sh = ((count & 0xF) << 12) | disp
+                out += pack(">BH", b, sh)
+            elif count <= 0x111 + 0xFFFF:
+                count -= 0x111
+                assert 0 <= count <= 0xFFFF
+                l = (1 << 28) | (count << 12) | disp
+                out += pack(">L", l)
+            else:
+                raise ValueError(count)
+        else:
+            out += pack(">B", t)
+
+    return out
+
+
+def compress_raw_lz11(
+    in_data: bytes, windowclass=NLZ11MatchFinder, level: int = GREEDY
+):
     out = bytearray()
     # body
-    length = 0
-    for tokens in chunkit(_compress(in_data, windowclass=NLZ11Window), 8):
-        flags = [type(t) == tuple for t in tokens]
-        out += pack(">B", packflags(flags))
-        length += 1
-
-        for t in tokens:
-            if type(t) == tuple:
-                count, disp = t
-                disp = (-disp) - 1
-                # if disp == 282:
-                #    raise Exception
-                assert 0 <= disp <= 0xFFF
-                if count <= 1 + 0xF:
-                    count -= 1
-                    assert 2 <= count <= 0xF
-                    sh = (count << 12) | disp
-                    out += pack(">H", sh)
-                    length += 2
-                elif count <= 0x11 + 0xFF:
-                    count -= 0x11
-                    assert 0 <= count <= 0xFF
-                    b = count >> 4
-                    sh = ((count & 0xF) << 12) | disp
-                    out += pack(">BH", b, sh)
-                    length += 3
-                elif count <= 0x111 + 0xFFFF:
-                    count -= 0x111
-                    assert 0 <= count <= 0xFFFF
-                    l = (1 << 28) | (count << 12) | disp
-                    out += pack(">L", l)
-                    length += 4
-                else:
-                    raise ValueError(count)
-            else:
-                out += pack(">B", t)
-                length += 1
+    for tokens in chunkit(_tokenize(in_data, windowclass, level), 8):
+        out += pack_tokens(tokens)
 
     # padding
-    padding = 4 - (length % 4 or 4)
+    padding = 4 - (len(out) % 4 or 4)
     if padding:
         out += b"\xff" * padding
 
+    return out
+
+
+def compress_lz11(in_data: bytes, level: int = GREEDY):
+    """
+    Compress data with LZ11.
 
-def compress_lz11(in_data: bytes):
+    :params in_data: The data to compress.
+    :params level: GREEDY (1) always takes the longest match, LAZY (2) defers a match when the next
+        position has a longer one, OPTIMAL (3) searches the smallest token stream. Higher levels give
+        smaller outputs but take longer.
+    """
     return bytearray(pack("<L", (len(in_data) << 8) + 0x11)) + compress_raw_lz11(
-        in_data
+        in_data, level=level
     )
+
+
+class LZ11Compressor(LZCompressor):
+    """
+    Incremental LZ11 compressor, see LZCompressor. The output is the same as compress_lz11.
+    """
+
+    magic = 0x11
+    finderclass = NLZ11MatchFinder
+    alignment = 4
+
+    def pack_tokens(self, tokens: list) -> bytearray:
+        return pack_tokens(tokens)
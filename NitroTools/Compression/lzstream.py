@@ -0,0 +1,290 @@
+import os
+from struct import pack
+from NitroTools.Compression.matchfinder import find_match
+
+
+class LZDecompressor:
+    """
+    Incremental decompressor for the LZ10/LZ11 formats, used like zlib.decompressobj:
+    feed the compressed data chunk by chunk to decompress(), which returns the data
+    decompressed so far. Only the sliding window and the bytes of an incomplete token
+    are kept between calls.
+
+    Subclasses define the magic, the error class, and how a back-reference is read.
+    """
+
+    # The size of the sliding window
+    size = 4096
+
+    magic = None
+    error = ValueError
+
+    def __init__(self):
+        self.decompressed_size = None
+        self.eof = False
+        self.unused_data = b""
+
+        self._pending = bytearray()
+        self._window = bytearray()
+        self._out_pos = 0
+        self._flags = 0
+        self._mask = 0
+
+        assert self.magic is not None
+
+    def read_reference(self, buf: bytearray, pos: int):
+        """
+        Read the back-reference that starts at buf[pos].
+
+        :returns: A tuple (count, displacement, next_pos), or None if buf doesn't hold the whole token yet.
+        """
+        raise Exception("The read_reference method must be overwritten")
+
+    def decompress(self, data: bytes) -> bytes:
+        """
+        Decompress a chunk of data.
+
+        :params data: The next chunk of compressed data.
+
+        :returns: The decompressed bytes that could be produced with the data received so far.
+        """
+        if self.eof:
+            self.unused_data += data
+            return b""
+
+        buf = self._pending
+        buf += data
+        pos = 0
+
+        if self.decompressed_size is None:
+            if len(buf) < 4:
+                return b""
+            magic = buf[0]
+            if magic != self.magic:
+                raise self.error(
+                    f"Invalid magic, expected {hex(self.magic)}, got {hex(magic)}"
+                )
+            self.decompressed_size = int.from_bytes(buf[1:4], "little")
+            pos = 4
+
+        out = self._window
+        out_start = len(out)
+        out_pos = self._out_pos
+        decompressed_size = self.decompressed_size
+        flags = self._flags
+        mask = self._mask
+        end = len(buf)
+
+        while out_pos < decompressed_size:
+            if not mask:
+                if pos >= end:
+                    break
+                flags = buf[pos]
+                pos += 1
+                mask = 0x80
+
+            if not flags & mask:
+                if pos >= end:
+                    break
+                out.append(buf[pos])
+                pos += 1
+                out_pos += 1
+
+            else:
+                reference = self.read_reference(buf, pos)
+                if reference is None:
+                    break
+                count, disp, pos = reference
+                if disp > len(out):
+                    raise self.error("Back-reference before the start of the data")
+                if out_pos + count > decompressed_size:
+                    raise self.error("Decompressed size does not match the expected size")
+
+                start = len(out) - disp
+                if disp >= count:
+                    out += out[start : start + count]
+                else:  # the reference overlaps the output, so it repeats with a period of disp
+                    out += (out[start:] * (count // disp + 1))[:count]
+                out_pos += count
+
+            mask >>= 1
+
+        del buf[:pos]
+        self._out_pos = out_pos
+        self._flags = flags
+        self._mask = mask
+
+        chunk = bytes(out[out_start:])
+        if len(out) > self.size:
+            del out[: -self.size]
+
+        if out_pos == decompressed_size:
+            self.eof = True
+            self.unused_data = bytes(buf)
+            buf.clear()
+
+        return chunk
+
+    def flush(self) -> bytes:
+        """
+        Check that the whole stream has been decompressed.
+
+        :returns: An empty bytes, since the decompressed data is always returned by decompress.
+        """
+        if not self.eof:
+            raise self.error("Unexpected end of the compressed data")
+        return b""
+
+
+class LZCompressor:
+    """
+    Incremental compressor for the LZ10/LZ11 formats: feed the data chunk by chunk to
+    feed(), which returns the compressed data produced so far, then call finish() to get
+    the end of the stream. The output is the same as the one of a greedy compression of
+    the whole data at once.
+
+    Only the sliding window, the lookahead (the longest possible match) and the tokens of
+    the current flag block are kept in memory.
+
+    The header stores the decompressed size. If it isn't known when the compressor is
+    created, the output starts with a placeholder header, and header() returns the bytes
+    to write over it once finish() has been called.
+
+    Subclasses define the magic, the match finder, how tokens are packed and the alignment
+    of the stream.
+
+    :params decompressed_size: The total size of the data that will be fed, if it's known.
+    """
+
+    magic = None
+    finderclass = None
+
+    # The compressed stream is padded with 0xFF to a multiple of this
+    alignment = 1
+
+    # Bytes of the window are only discarded once this many bytes can go at once
+    discard_threshold = 0x10000
+
+    def __init__(self, decompressed_size: int = None):
+        self.decompressed_size = decompressed_size
+        self.total_size = 0
+        self.finished = False
+
+        self._buf = bytearray()
+        self._pos = 0
+        self._tokens = []
+        self._length = 0
+        self._header_sent = False
+
+        assert self.magic is not None and self.finderclass is not None
+
+    def pack_tokens(self, tokens: list) -> bytearray:
+        """
+        Packs up to 8 tokens, preceded by their flag byte.
+        """
+        raise Exception("The pack_tokens method must be overwritten")
+
+    def header(self) -> bytes:
+        """
+        Returns the 4 bytes header of the stream. If no decompressed size was given, it's
+        only valid once finish() has been called.
+        """
+        size = self.decompressed_size
+        if size is None:
+            size = self.total_size if self.finished else 0
+        return pack("<L", (size << 8) + self.magic)
+
+    def feed(self, data: bytes) -> bytes:
+        """
+        Compress a chunk of data.
+
+        :params data: The next chunk of data.
+
+        :returns: The compressed bytes that could be produced with the data received so far.
+        """
+        if self.finished:
+            raise Exception("The compressor has already been finished")
+        self._buf += data
+        self.total_size += len(data)
+        return self._encode(final=False)
+
+    def finish(self) -> bytes:
+        """
+        Compress the remaining data, and end the stream.
+
+        :returns: The last compressed bytes.
+        """
+        if self.finished:
+            raise Exception("The compressor has already been finished")
+        if self.decompressed_size is not None and self.decompressed_size != self.total_size:
+            raise ValueError(
+                f"Expected {self.decompressed_size} bytes, received {self.total_size}"
+            )
+        out = self._encode(final=True)
+        if self._tokens:
+            block = self.pack_tokens(self._tokens)
+            self._tokens = []
+            self._length += len(block)
+            out += block
+        padding = self.alignment - (self._length % self.alignment or self.alignment)
+        if padding:
+            self._length += padding
+            out += b"\xff" * padding
+        self.finished = True
+        return out
+
+    def _encode(self, final: bool) -> bytes:
+        out = bytearray()
+        if not self._header_sent:
+            out += self.header()
+            self._header_sent = True
+
+        buf = self._buf
+        pos = self._pos
+        tokens = self._tokens
+        finder = self.finderclass
+        size, disp_min = finder.size, finder.disp_min
+        match_min, match_max = finder.match_min, finder.match_max
+        end = len(buf)
+        # without the whole lookahead, a longer match might still come with the next chunk
+        stop = end if final else end - match_max
+
+        while pos < stop:
+            match = find_match(buf, pos, end, size, disp_min, match_min, match_max)
+            if match:
+                tokens.append(match)
+                pos += match[0]
+            else:
+                tokens.append(buf[pos])
+                pos += 1
+
+            if len(tokens) == 8:
+                block = self.pack_tokens(tokens)
+                self._length += len(block)
+                out += block
+                tokens.clear()
+
+        discard = pos - size
+        if discard >= self.discard_threshold:
+            del buf[:discard]
+            pos -= discard
+        self._pos = pos
+
+        return bytes(out)
+
+    @classmethod
+    def compress_file(
+        cls, in_filepath: str, out_filepath: str, chunk_size: int = 0x10000
+    ) -> None:
+        """
+        Compress a file to another file, without loading it in memory.
+
+        :params in_filepath: The file to compress.
+        :params out_filepath: The destination filepath.
+        :params chunk_size: The size of the chunks read from the input file.
+        """
+        compressor = cls(os.path.getsize(in_filepath))
+        with open(in_filepath, mode="rb") as f_in, open(out_filepath, mode="wb") as f_out:
+            while chunk := f_in.read(chunk_size):
+                f_out.write(compressor.feed(chunk))
+            f_out.write(compressor.finish())
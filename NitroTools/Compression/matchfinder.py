@@ -0,0 +1,253 @@
+# Matches are extended byte by byte up to this length, and by blocks beyond it
+MATCH_SHORT_LEN = 64
+
+
+def find_match(
+    data: bytes,
+    pos: int,
+    end: int,
+    size: int,
+    disp_min: int,
+    match_min: int,
+    match_max: int,
+):
+    """
+    Find the longest match for the bytes at data[pos:end] in the sliding window
+    that ends at pos. The match may overlap pos, as in any LZ77 stream.
+
+    When several matches have the same length, the one with the biggest displacement
+    is returned, which is what SlidingWindow.search picks as well: both engines produce
+    the same token stream.
+
+    :params data: The buffer (bytes or bytearray) holding the window and the lookahead.
+    :params pos: The position to search a match for.
+    :params end: The end of the available data in the buffer.
+    :params size: The size of the sliding window.
+    :params disp_min: The minimum displacement of a match.
+    :params match_min: The minimum length of a match.
+    :params match_max: The maximum length of a match, inclusive.
+
+    :returns: A tuple (count, -displacement), or None if there is no match of at least match_min bytes.
+    """
+    max_len = min(end - pos, match_max)
+    if max_len < match_min:
+        return None
+
+    lo = pos - size if pos > size else 0
+    last = pos - disp_min  # the last position a match can start from
+    if last < lo:
+        return None
+
+    # bytes.find returns the leftmost occurrence, that is the biggest displacement
+    length = match_min
+    start = data.find(data[pos : pos + length], lo, last + length)
+    if start < 0:
+        return None
+
+    while True:
+        # most matches are short: only longer ones are extended by blocks
+        short_len = min(length + MATCH_SHORT_LEN, max_len)
+        while length < short_len and data[start + length] == data[pos + length]:
+            length += 1
+        if length == short_len:
+            length = extend_match(data, start, pos, length, max_len)
+        if length == max_len:
+            break
+        # only a later occurrence of a longer needle can beat the current match
+        start_next = data.find(data[pos : pos + length + 1], start + 1, last + length + 1)
+        if start_next < 0:
+            break
+        start = start_next
+        length += 1
+
+    return length, start - pos
+
+
+def extend_match(data: bytes, start: int, pos: int, length: int, max_len: int) -> int:
+    """
+    Extend a match between data[start:] and data[pos:], whose first length bytes are equal.
+    Blocks of bytes are compared at once: their size doubles while they are equal, and is
+    halved once they aren't, so a match of n bytes takes O(log n) comparisons instead of n.
+    It keeps long runs, like the padding of a file, cheap to compress.
+
+    :returns: The length of the match, at most max_len.
+    """
+    step = MATCH_SHORT_LEN
+    while length < max_len:
+        step = min(step, max_len - length)
+        if data[start + length : start + length + step] == data[pos + length : pos + length + step]:
+            length += step
+            step <<= 1
+        elif step == 1:
+            break
+        else:
+            step >>= 1
+    return length
+
+
+class MatchFinder:
+    """
+    Drop-in replacement for SlidingWindow, built on find_match. Instead of maintaining
+    a hash of the window byte by byte, it lets bytes.find scan the window in C, so
+    advancing the window is free and searching doesn't loop over candidates in Python.
+    """
+
+    # The size of the sliding window
+    size = 4096
+
+    # The minimum displacement.
+    disp_min = 2
+
+    # The minimum length for a successful match in the window
+    match_min = 3
+
+    # The maximum length of a successful match, inclusive.
+    match_max = None
+
+    def __init__(self, buf):
+        self.data = bytes(buf)
+        self.index = 0
+
+        assert self.match_max is not None
+
+    def next(self):
+        self.index += 1
+
+    def advance(self, n=1):
+        """Advance the window by n bytes"""
+        self.index += n
+
+    def search(self):
+        return find_match(
+            self.data,
+            self.index,
+            len(self.data),
+            self.size,
+            self.disp_min,
+            self.match_min,
+            self.match_max,
+        )
+
+
+# Parsing levels of the LZ10/LZ11 compressors
+GREEDY = 1
+LAZY = 2
+OPTIMAL = 3
+
+
+def lazy_parse(in_data: bytes, windowclass):
+    """
+    Generates a stream of tokens like a greedy search, but before taking a match, checks whether
+    the next position has a longer one. If it does, a literal is emitted instead and the
+    longer match is taken.
+    """
+    window = windowclass(in_data)
+
+    # the window is only searched inside the data: the legacy windows read the byte at their index
+    i = 0
+    match = window.search() if in_data else None
+    while i < len(in_data):
+        window.next()
+        if match is None:
+            yield in_data[i]
+            i += 1
+            match = window.search() if i < len(in_data) else None
+            continue
+
+        following = window.search() if i + 1 < len(in_data) else None
+        if following is not None and following[0] > match[0]:
+            yield in_data[i]
+            i += 1
+            match = following
+        else:
+            yield match
+            window.advance(match[0] - 1)
+            i += match[0]
+            match = window.search() if i < len(in_data) else None
+
+
+def optimal_parse(in_data: bytes, windowclass, match_cost, nice_length: int = None):
+    """
+    Generates a stream of tokens that minimizes the size of the output: the longest match
+    is searched at every position, then the cheapest path through literals and (possibly
+    shortened) matches is found backwards.
+
+    :params in_data: The data to compress.
+    :params windowclass: The match finder class.
+    :params match_cost: A function returning the cost in bits of a match of the given length,
+        including its flag bit. A literal costs 9 bits.
+    :params nice_length: Matches at least this long are taken as is, and the positions they
+        cover are not searched. It bounds the time spent on long runs.
+    """
+    n = len(in_data)
+    window = windowclass(in_data)
+    match_min = windowclass.match_min
+    lengths = [0] * n
+    disps = [0] * n
+
+    i = 0
+    while i < n:
+        match = window.search()
+        if match is None:
+            window.next()
+            i += 1
+            continue
+        lengths[i], disps[i] = match
+        if nice_length is not None and match[0] >= nice_length:
+            window.advance(match[0])
+            i += match[0]
+        else:
+            window.next()
+            i += 1
+
+    # The cost of a match only changes at a few lengths: all the short lengths are tried,
+    # but beyond that, only the longest length of each cost band is worth trying.
+    short_max = match_min + 0xF
+    bands = [
+        count
+        for count in range(short_max, windowclass.match_max)
+        if match_cost(count + 1) != match_cost(count)
+    ]
+    short_costs = [match_cost(count) for count in range(short_max + 1)]
+
+    costs = [0] * (n + 1)
+    choices = [1] * n
+    for i in range(n - 1, -1, -1):
+        best = costs[i + 1] + 9
+        length = lengths[i]
+        if length:
+            choice = 1
+            if nice_length is not None and length >= nice_length:
+                cost = costs[i + length] + match_cost(length)
+                if cost < best:
+                    best = cost
+                    choice = length
+            else:
+                for count in range(match_min, min(length, short_max) + 1):
+                    cost = costs[i + count] + short_costs[count]
+                    if cost < best:
+                        best = cost
+                        choice = count
+                if length > short_max:
+                    for count in bands:
+                        if count >= length:
+                            break
+                        cost = costs[i + count] + match_cost(count)
+                        if cost < best:
+                            best = cost
+                            choice = count
+                    cost = costs[i + length] + match_cost(length)
+                    if cost < best:
+                        best = cost
+                        choice = length
+            choices[i] = choice
+        costs[i] = best
+
+    i = 0
+    while i < n:
+        count = choices[i]
+        if count == 1:
+            yield in_data[i]
+        else:
+            yield count, disps[i]
+        i += count
@@ -0,0 +1,155 @@
+from math import ceil
+from NitroTools.Compression.lz10 import LZ10Decompressor
+from NitroTools.Compression.lz11 import LZ11Decompressor
+from NitroTools.Compression.huffman import decompress_raw_huffman
+from NitroTools.Compression.rle import RLE_RUN_MAX
+
+
+# The code of each compression, from the first byte of the header
+COMPRESSION_MAGICS = {0x10: "lz10", 0x11: "lz11", 0x24: "huff4", 0x28: "huff8", 0x30: "rle"}
+
+# The biggest decompressed size a byte of compressed data can give, for each compression, rounded up:
+# - LZ: a flag byte and 8 references of the longest length, 2 bytes for 0x12 bytes with LZ10,
+#   4 bytes for 0x10110 bytes with LZ11
+# - Huffman: 1 bit codes, so a byte gives 8 symbols of 4 or 8 bits
+# - RLE: 2 bytes runs of RLE_RUN_MAX bytes
+MAX_RATIOS = {
+    "lz10": ceil(8 * 0x12 / (1 + 8 * 2)),
+    "lz11": ceil(8 * 0x10110 / (1 + 8 * 4)),
+    "huff4": 8 * 4 // 8,
+    "huff8": 8 * 8 // 8,
+    "rle": ceil(RLE_RUN_MAX / 2),
+}
+
+# The number of bytes the trial decode tries to produce, by default
+PROBE_SIZE = 0x400
+
+
+def trial_lz(decompressor, in_data: bytes, trial_size: int) -> bool:
+    # the data is fed in small chunks, since a few bytes of LZ11 can give a lot of output
+    produced = 0
+    for pos in range(0, len(in_data), 0x40):
+        if produced >= trial_size or decompressor.eof:
+            break
+        produced += len(decompressor.decompress(bytes(in_data[pos : pos + 0x40])))
+    return True
+
+
+def trial_huffman(
+    in_data: bytes, decompressed_size: int, num_bits: int, trial_size: int
+) -> bool:
+    payload = in_data[4:]
+    tree_size = (payload[0] + 1) << 1
+    if tree_size > len(payload):
+        return False
+    # no code is longer than 16 bits
+    size = min(decompressed_size, trial_size)
+    decompress_raw_huffman(payload[: tree_size + size * 2 * 8 // num_bits + 4], size, num_bits)
+    return True
+
+
+def trial_rle(in_data: bytes, decompressed_size: int, trial_size: int) -> bool:
+    # any stream is valid, but the blocks must end on the decompressed size
+    size = min(decompressed_size, trial_size)
+    out_pos = 0
+    pos = 4
+    while out_pos < size:
+        if pos >= len(in_data):
+            return False
+        decode_value = in_data[pos]
+        if decode_value <= 127:
+            out_pos += decode_value + 1
+            pos += decode_value + 2
+        else:
+            out_pos += decode_value - 125
+            pos += 2
+    return out_pos <= decompressed_size and pos <= len(in_data)
+
+
+def probe(in_data: bytes, trial_size: int = PROBE_SIZE):
+    """
+    Guess whether the data is compressed, without decompressing all of it. The header must have
+    a known compression flag, and a decompressed size that the size of the data can give. Then the
+    start of the data is decompressed, which must not fail.
+
+    Since any data can have a valid header by chance, especially small data, the result is a guess:
+    decompress can still fail on data that passes.
+
+    :params in_data: The data to probe.
+    :params trial_size: The number of bytes the trial decode tries to produce.
+
+    :returns: A tuple (code, decompressed_size), or None if the data doesn't look compressed.
+    """
+    if len(in_data) < 5:
+        return None
+    code = COMPRESSION_MAGICS.get(in_data[0])
+    if code is None:
+        return None
+    decompressed_size = int.from_bytes(in_data[1:4], "little")
+    if not decompressed_size or decompressed_size > (len(in_data) - 4) * MAX_RATIOS[code]:
+        return None
+
+    try:
+        match code:
+            case "lz10":
+                plausible = trial_lz(LZ10Decompressor(), in_data, trial_size)
+            case "lz11":
+                plausible = trial_lz(LZ11Decompressor(), in_data, trial_size)
+            case "huff4":
+                plausible = trial_huffman(in_data, decompressed_size, 4, trial_size)
+            case "huff8":
+                plausible = trial_huffman(in_data, decompressed_size, 8, trial_size)
+            case "rle":
+                plausible = trial_rle(in_data, decompressed_size, trial_size)
+    except ValueError:
+        return None
+
+    return (code, decompressed_size) if plausible else None
+
+
+class DecompressionLimitError(ValueError):
+    pass
+
+
+def decompressed_size(in_data: bytes, code: str = None) -> int:
+    """
+    Returns the decompressed size the data claims, from its header, or from its footer for BLZ.
+    """
+    if code == "blz":
+        if len(in_data) < 4:
+            raise DecompressionLimitError("Missing BLZ footer")
+        return len(in_data) + int.from_bytes(in_data[-4:], "little")
+    if len(in_data) < 4:
+        raise DecompressionLimitError("Missing compression header")
+    return int.from_bytes(in_data[1:4], "little")
+
+
+def check_limits(
+    in_data: bytes,
+    code: str = None,
+    max_size: int = None,
+    max_ratio: float = None,
+    trial_size: int = None,
+) -> None:
+    """
+    Check that decompressing the data stays within the given limits, before allocating the output.
+    Raises a DecompressionLimitError if it doesn't.
+
+    :params in_data: The compressed data.
+    :params code: The code of the compression, only needed for BLZ, which has no header.
+    :params max_size: The maximum decompressed size, in bytes.
+    :params max_ratio: The maximum ratio between the decompressed size and the size of the data.
+    :params trial_size: The number of bytes a trial decode produces (see probe), before the real one.
+        Data that isn't compressed usually fails the trial, so it costs at most this much work.
+    """
+    size = decompressed_size(in_data, code)
+    if max_size is not None and size > max_size:
+        raise DecompressionLimitError(
+            f"The decompressed size is {size} bytes, more than {max_size}"
+        )
+    if max_ratio is not None and size > len(in_data) * max_ratio:
+        raise DecompressionLimitError(
+            f"The compression ratio is {size / len(in_data):.1f}, more than {max_ratio}"
+        )
+    if trial_size is not None and code != "blz" and probe(in_data, trial_size) is None:
+        raise DecompressionLimitError("The trial decode failed, the data doesn't look compressed")
@@ -1,25 +1,50 @@
 from NitroTools.FileSystem import EndianBinaryStreamReader
 from struct import pack
+import re
+
+try:
+    import numpy as np
+except ImportError:  # runs are searched with a regular expression instead
+    np = None
 
 
 class DecompressionError(ValueError):
     pass
 
 
+# Runs of 3 to 130 identical bytes are encoded as a (length + 125, byte) couple,
+# other bytes are copied in literal blocks of 1 to 128 bytes
+RLE_RUN_MIN = 3
+RLE_RUN_MAX = 130
+RLE_LITERAL_MAX = 128
+
+RLE_RUN_PATTERN = re.compile(rb"(.)\1\1+", re.DOTALL)
+
+
 def decompress_raw_rle(in_data: bytes, decompressed_size: int) -> bytearray:
-    out_data = bytearray()
-    stream = EndianBinaryStreamReader(in_data)
+    out_data = bytearray(decompressed_size)
+    out_pos = 0
+    pos = 0
 
-    while len(out_data) < decompressed_size:
+    try:
+        while out_pos < decompressed_size:
+            decode_value = in_data[pos]
 
-        decode_value = stream.read_UInt8()
+            if decode_value <= 127:
+                count = decode_value + 1
+                out_data[out_pos : out_pos + count] = in_data[pos + 1 : pos + 1 + count]
+                pos += 1 + count
 
-        if decode_value <= 127:
-            out_data += stream.read(decode_value + 1)
+            else:
+                count = decode_value - 125
+                out_data[out_pos : out_pos + count] = bytes((in_data[pos + 1],)) * count
+                pos += 2
 
-        else:
-            out_data += stream.read(1) * (decode_value - 125)
+            out_pos += count
+    except IndexError:
+        raise DecompressionError("Unexpected end of the compressed data")
 
+    # a truncated literal block shrinks the output, the last block may overflow it
     if len(out_data) != decompressed_size:
         raise DecompressionError("Decompressed size does not match the expected size")
 
@@ -36,45 +61,60 @@ def decompress_rle(in_data: bytes) -> bytearray:
     return decompress_raw_rle(in_data[4:], decompressed_size)
 
 
+def find_runs(in_data: bytes) -> list[tuple[int, int]]:
+    """
+    Find all the runs of at least RLE_RUN_MIN identical bytes in one pass: the boundaries
+    are compared at once with NumPy when it's installed, otherwise a regular expression
+    scans the data.
+
+    :returns: A list of (start, length) tuples, one for each run, in order.
+    """
+    if np is None:
+        return [
+            (match.start(), match.end() - match.start())
+            for match in RLE_RUN_PATTERN.finditer(in_data)
+        ]
+
+    data = np.frombuffer(in_data, dtype=np.uint8)
+    starts = np.flatnonzero(data[1:] != data[:-1]) + 1
+    starts = np.concatenate(([0], starts))
+    lengths = np.diff(np.append(starts, len(data)))
+    runs = lengths >= RLE_RUN_MIN
+    return list(zip(starts[runs].tolist(), lengths[runs].tolist()))
+
+
 def compress_raw_rle(in_data: bytes):
+    """
+    Encode the data from its runs, found beforehand by find_runs: the bytes between two runs
+    are copied in literal blocks, and each run is split in blocks of at most RLE_RUN_MAX bytes.
+    """
     out_data = bytearray()
-    idx = 0
-    while idx < len(in_data):
-        stream = bytearray()
-        first_byte = in_data[idx]
-        stream.append(first_byte)
-        idx += 1
-
-        while idx < len(in_data) and in_data[idx] == first_byte and len(stream) < 130:
-            stream.append(in_data[idx])
-            idx += 1
-
-        if len(stream) > 2:  # encode consecutive identical bytes
-            out_data.append(len(stream) + 125)
-            out_data.append(first_byte)
-
-        else:  # encode consecutive different bytes
-            reps = 1
-            comp_byte = in_data[idx]
-            stream.append(comp_byte)
-            idx += 1
-            while idx < len(in_data) and len(stream) < 128:
-                stream.append(in_data[idx])
-                if comp_byte == in_data[idx]:
-                    reps += 1
-                    if (
-                        reps == 3
-                    ):  # if the last 3 bytes are identical, we remove them from the stream and go back
-                        idx -= 2
-                        stream = stream[:-3]
-                        break
-                else:
-                    reps = 1
-                    comp_byte = in_data[idx]
-                idx += 1
-
-            out_data.append(len(stream) - 1)
-            out_data += stream
+    pos = 0  # the start of the bytes that aren't encoded yet
+
+    # the end of the data acts as an empty run
+    for start, length in find_runs(in_data) + [(len(in_data), 0)]:
+        while pos < start:  # encode consecutive different bytes
+            count = start - pos
+            if count >= RLE_LITERAL_MAX:
+                count = RLE_LITERAL_MAX
+            elif count > RLE_LITERAL_MAX - RLE_RUN_MIN:
+                # a run only ends a literal block if its first 3 bytes fit in it:
+                # otherwise its first bytes complete the block
+                taken = min(length, RLE_LITERAL_MAX - count)
+                count += taken
+                start += taken
+                length -= taken
+            out_data.append(count - 1)
+            out_data += in_data[pos : pos + count]
+            pos += count
+
+        # the end of a run that is too short is left to the next literal block
+        while length >= RLE_RUN_MIN:  # encode consecutive identical bytes
+            count = min(length, RLE_RUN_MAX)
+            out_data.append(count + 125)
+            out_data.append(in_data[pos])
+            pos += count
+            length -= count
 
     return out_data
 
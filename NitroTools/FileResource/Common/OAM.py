@@ -1,13 +1,19 @@
 from PIL import Image
 from NitroTools.FileResource.Common.Tile import Tile
-from NitroTools.FileResource.Common.utils import convert_from_eightbpp
+from NitroTools.FileResource.Common.TileSheet import TileSheet
+from NitroTools.FileResource.Common.utils import (
+    convert_from_eightbpp,
+    tiled_to_linear,
+    linear_to_tiled,
+)
 
 
 class OAM:
     """
     The OAM object represents a square, either formed by tile(s) or linear.
 
-    :params in_data: Either a list of Tile, or a Pillow Image.Image with the right size (and P mode).
+    :params in_data: Either a list of Tile, a TileSheet starting with the tiles of the OAM,
+        or a Pillow Image.Image with the right size (and P mode).
     :params size: The size of the OAM. Naturally, it must be one of those supported by the Nintendo DS.
     :params bit_depth: The bit depth of the tile data.
     :params linear: True if the data is untiled and stored linearly, False if it's tiled.
@@ -15,7 +21,7 @@ class OAM:
 
     def __init__(
         self,
-        in_data: list[Tile] | Image.Image,
+        in_data: list[Tile] | TileSheet | Image.Image,
         size: tuple[int, int],
         pal_idx: int,
         bit_depth: int,
@@ -35,24 +41,31 @@ class OAM:
             self.tiles = in_data
             self.image = self.build_image()
 
+        elif isinstance(in_data, TileSheet):
+            assert len(in_data) >= self.tile_count, "Not enough tiles"
+            self.tiles = in_data[: self.tile_count]
+            self.image = self.build_image()
+
         elif isinstance(in_data, Image.Image):
             assert (
                 size == in_data.size
             ), "Passed size and actual Image size are different"
-            self.tiles = []
-            for j in range(self.tile_height_count):
-                for i in range(self.tile_width_count):
-                    tile = Tile(
-                        in_data.crop((i * 8, j * 8, (i + 1) * 8, (j + 1) * 8)),
-                        self.bit_depth,
-                    )
-                    self.tiles.append(tile)
+            data = in_data.tobytes()
+            if not self.linear:
+                data = linear_to_tiled(data, size)
+            self.tiles = TileSheet(convert_from_eightbpp(data, self.bit_depth), self.bit_depth)
             self.image = in_data
 
         else:
             raise Exception("Invalid input, expected bytes or Image.Image")
 
     def build_image(self) -> Image.Image:
+        if isinstance(self.tiles, TileSheet):
+            data = self.tiles.to_eightbpp(self.pal_idx)
+            if not self.linear:
+                data = tiled_to_linear(data, self.size)
+            return Image.frombytes(mode="P", size=self.size, data=bytes(data))
+
         it_tiles = iter(self.tiles)
         image = Image.new(mode="P", size=self.size)
         if self.linear:
@@ -75,6 +88,9 @@ class OAM:
         if self.linear:
             data = convert_from_eightbpp(self.image.tobytes(), self.bit_depth)
 
+        elif isinstance(self.tiles, TileSheet):
+            data = self.tiles.to_bytes()
+
         else:
             data = bytearray()
             for tile in self.tiles:
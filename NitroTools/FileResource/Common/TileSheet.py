@@ -0,0 +1,198 @@
+from array import array
+from PIL import Image
+from NitroTools.FileSystem.ColorCodec import or_bytes
+from NitroTools.FileResource.Common.Tile import Tile, EXPECTED_DATA_SIZE
+from NitroTools.FileResource.Common.utils import (
+    convert_from_eightbpp,
+    convert_to_eightbpp,
+    tiled_to_linear,
+)
+
+
+class TileSheet:
+    """
+    The TileSheet object holds consecutive 8x8 pixel tiles in a single buffer, instead of a Tile object each.
+    It can be used like a list of Tile: indexing it returns a TileView of the tile, and slicing it returns
+    a TileSheet sharing the same buffer, so neither copies any tile data.
+
+    :params in_data: Either bytes (a bitmap stream, copied once), or a writable memoryview (shared).
+        A trailing incomplete tile is ignored.
+    :params bit_depth: The bit depth of the tile data.
+    """
+
+    __slots__ = ("bit_depth", "tile_datasize", "data")
+
+    def __init__(self, in_data: bytes | bytearray | memoryview, bit_depth: int):
+        self.bit_depth = bit_depth
+        self.tile_datasize = EXPECTED_DATA_SIZE[bit_depth]
+        if not isinstance(in_data, memoryview):
+            in_data = memoryview(bytearray(in_data))
+        self.data = in_data[: len(in_data) - len(in_data) % self.tile_datasize]
+
+    def __len__(self) -> int:
+        return len(self.data) // self.tile_datasize
+
+    def __iter__(self):
+        return (TileView(self, idx) for idx in range(len(self)))
+
+    def __getitem__(self, key: int | slice):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            assert step == 1, "Only contiguous tiles can be sliced"
+            return TileSheet(
+                self.data[start * self.tile_datasize : max(start, stop) * self.tile_datasize],
+                self.bit_depth,
+            )
+        return self.tile(key)
+
+    def __setitem__(self, key: int | slice, value):
+        if isinstance(key, slice):
+            start, _, step = key.indices(len(self))
+            assert step == 1, "Only contiguous tiles can be sliced"
+            self.set_tiles(start, value)
+        else:
+            self.set_tile(key, value)
+
+    def tile(self, idx: int) -> "TileView":
+        """
+        Returns a view of the tile at the given index.
+        """
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("Tile index out of range")
+        return TileView(self, idx)
+
+    def set_tile(self, idx: int, in_data: bytes | Image.Image | Tile) -> None:
+        """
+        Replace the tile at the given index, in place.
+
+        :params in_data: Either bytes (the tile data), an 8x8 Pillow Image.Image (with P mode), or a Tile.
+        """
+        if isinstance(in_data, Image.Image):
+            assert in_data.size == (8, 8), "Image dimensions should be 8,8"
+            in_data = convert_from_eightbpp(in_data.tobytes(), self.bit_depth)
+        elif not isinstance(in_data, (bytes, bytearray, memoryview)):
+            in_data = in_data.to_bytes()
+        assert len(in_data) == self.tile_datasize, "Invalid data size"
+        start = self.tile(idx).index * self.tile_datasize
+        self.data[start : start + self.tile_datasize] = in_data
+
+    def set_tiles(self, idx: int, tiles) -> None:
+        """
+        Replace consecutive tiles in place, starting at the given index.
+
+        :params tiles: Either a TileSheet, the data of the tiles, or a list of Tile.
+        """
+        if isinstance(tiles, TileSheet):
+            tiles = tiles.data
+        elif not isinstance(tiles, (bytes, bytearray, memoryview)):
+            tiles = b"".join(bytes(tile.to_bytes()) for tile in tiles)
+        assert len(tiles) % self.tile_datasize == 0, "Invalid data size"
+        start = idx * self.tile_datasize
+        assert start + len(tiles) <= len(self.data), "Tile index out of range"
+        self.data[start : start + len(tiles)] = tiles
+
+    def to_bytes(self) -> bytes:
+        """
+        Returns the bitmap data of the tiles.
+        """
+        return self.data.tobytes()
+
+    def to_eightbpp(self, pal_idx: int = 0) -> bytearray:
+        """
+        Returns the pixels of the tiles with 1 byte each, tile after tile.
+
+        :params pal_idx: Push the pixels to the given palette index.
+        """
+        return convert_to_eightbpp(self.data, self.bit_depth, pal_idx)
+
+    def flipped_tiles(self) -> list[bytes]:
+        """
+        Returns the 8bpp pixels of each tile (64 bytes), as is, flipped left/right, flipped top/bottom,
+        then flipped both ways: the tile of index i with the flips of a tilemap value v is at
+        ((v >> 10) & 3) * len(self) + i. Each flip is done for all the tiles at once, by moving
+        columns of pixels, or rows as 64 bits integers.
+        """
+        tiles = bytes(self.to_eightbpp())
+        flip_lr = bytearray(len(tiles))
+        for x in range(8):
+            flip_lr[x::8] = tiles[7 - x :: 8]
+        flips = [tiles, bytes(flip_lr)]
+        for data in (tiles, flip_lr):
+            rows = array("Q", data)
+            flip_tb = array("Q", bytes(len(data)))
+            for y in range(8):
+                flip_tb[y::8] = rows[7 - y :: 8]
+            flips.append(flip_tb.tobytes())
+        return [data[pos : pos + 64] for data in flips for pos in range(0, len(data), 64)]
+
+    def render_tilemap(self, mapvalues: list[int], im_size: tuple[int, int]) -> bytes:
+        """
+        Returns the pixels of an image made of the tiles, as placed by a tilemap. The tilemap is decoded
+        into the index of each flipped tile and of each palette, then the tiles are joined at once,
+        the palettes are added to their pixels with one big integer or, and the result is untiled.
+
+        :params mapvalues: The 16 bits value of each tile of the image, left/right top/bottom
+            (see MapData.encode). Tiles without a value are 0.
+        :params im_size: The size of the image, a multiple of 8.
+
+        :returns: The pixels of the image, 1 byte each.
+        """
+        tile_count = len(self)
+        mapvalues = mapvalues[: (im_size[0] // 8) * (im_size[1] // 8)]
+        tile_idxs = [value & 0x3FF for value in mapvalues]
+        if tile_idxs and max(tile_idxs) >= tile_count:
+            raise IndexError("Tile index out of range")
+        flipped_idxs = [
+            ((value >> 10) & 3) * tile_count + tile_idx
+            for value, tile_idx in zip(mapvalues, tile_idxs)
+        ]
+        data = b"".join(map(self.flipped_tiles().__getitem__, flipped_idxs))
+
+        # 8bpp tiles don't use the palette index, as in convert_to_eightbpp
+        pal_idxs = [value >> 12 for value in mapvalues] if self.bit_depth != 8 else []
+        if any(pal_idxs):
+            pal_tiles = [bytes([pal_idx << self.bit_depth]) * 64 for pal_idx in range(16)]
+            data = or_bytes(data, b"".join(map(pal_tiles.__getitem__, pal_idxs)))
+
+        return tiled_to_linear(data, im_size)
+
+
+class TileView:
+    """
+    A tile of a TileSheet, which behaves like a Tile without holding a copy of its data.
+    """
+
+    __slots__ = ("sheet", "index")
+
+    def __init__(self, sheet: TileSheet, index: int):
+        self.sheet = sheet
+        self.index = index
+
+    @property
+    def bit_depth(self) -> int:
+        return self.sheet.bit_depth
+
+    @property
+    def data(self) -> bytes:
+        return self.to_bytes()
+
+    def to_bytes(self) -> bytes:
+        """
+        Returns the bitmap data of this tile.
+        """
+        size = self.sheet.tile_datasize
+        return self.sheet.data[self.index * size : (self.index + 1) * size].tobytes()
+
+    def to_im(self, pal_idx: int) -> Image.Image:
+        """
+        Creates an Image representing this tile, see Tile.to_im.
+
+        :params pal_idx: Push the pixels to the given palette index.
+        """
+        return Image.frombytes(
+            mode="P",
+            size=(8, 8),
+            data=convert_to_eightbpp(self.to_bytes(), self.bit_depth, pal_idx),
+        )
@@ -1,3 +1,4 @@
 from NitroTools.FileResource.Common.OAM import OAM
 from NitroTools.FileResource.Common.Tile import Tile
+from NitroTools.FileResource.Common.TileSheet import TileSheet, TileView
 from NitroTools.FileResource.Common.utils import *
@@ -1,5 +1,5 @@
 import csv
-import struct
+from array import array
 from PIL import Image
 
 from NitroTools.FileSystem import EndianBinaryStreamReader
@@ -12,87 +12,181 @@ def parse_fileinfo(filepath):
     return out[1:]
 
 
+# Pixels of less than 8 bits are stored from the low bits of a byte to the high bits.
+# For each position of a pixel in its byte, the pixel of each byte value, for each
+# (bit depth, palette index) used so far
+UNPACK_TABLES = {}
+
+# For each bit depth, and each position of a pixel in its byte, the bits of each pixel value
+PACK_TABLES = {
+    bit_depth: [
+        bytes((value & ((1 << bit_depth) - 1)) << shift for value in range(256))
+        for shift in range(0, 8, bit_depth)
+    ]
+    for bit_depth in (1, 2, 4)
+}
+
+
+def unpack_tables(bit_depth: int, pal_idx: int) -> list[bytes]:
+    tables = UNPACK_TABLES.get((bit_depth, pal_idx))
+    if tables is None:
+        mask = (1 << bit_depth) - 1
+        offset = pal_idx << bit_depth
+        tables = UNPACK_TABLES[(bit_depth, pal_idx)] = [
+            bytes(((byte >> shift) & mask) + offset for byte in range(256))
+            for shift in range(0, 8, bit_depth)
+        ]
+    return tables
+
+
+def unpack_pixels(data: bytes | bytearray, bit_depth: int, pal_idx: int = 0) -> bytearray:
+    """
+    Convert a stream of 1, 2 or 4 bits pixels to 8 bits pixels. The pixels of each position in
+    a byte are translated from the bytes at once, and written to every (8 / bit_depth)th pixel.
+
+    :params pal_idx: The palette idx the pixels should be pushed to (see convert_to_eightbpp).
+    """
+    data = bytes(data)
+    per_byte = 8 // bit_depth
+    out = bytearray(len(data) * per_byte)
+    for idx, table in enumerate(unpack_tables(bit_depth, pal_idx)):
+        out[idx::per_byte] = data.translate(table)
+    return out
+
+
+def pack_pixels(data: bytes | bytearray, bit_depth: int) -> bytearray:
+    """
+    Convert a stream of 8 bits pixels to 1, 2 or 4 bits pixels, keeping their low bits. The pixels
+    of each position in a byte are translated to their bits at once, and the positions are merged
+    with a big integer or, since their bits don't overlap. Trailing pixels that don't fill a byte
+    are dropped.
+    """
+    per_byte = 8 // bit_depth
+    count = len(data) // per_byte
+    data = bytes(data[: count * per_byte])
+    packed = 0
+    for idx, table in enumerate(PACK_TABLES[bit_depth]):
+        packed |= int.from_bytes(data[idx::per_byte].translate(table), "little")
+    return bytearray(packed.to_bytes(count, "little"))
+
+
 def eightbpp_to_fourbpp(data: bytes | bytearray):
-    newdata = bytearray()
-    it = iter(data)
-    for _ in range(len(data) // 2):
-        val1 = next(it) % 0x10
-        val2 = next(it) % 0x10
-        newdata += struct.pack("<B", val2 * 0x10 + val1)
-    return newdata
+    return pack_pixels(data, 4)
 
 
 def fourbpp_to_eightbpp(data: bytes | bytearray, pal_idx: int = 0):
-    newdata = bytearray()
-    for val in data:
-        p1 = (val % 0x10) + (0x10 * pal_idx)
-        p2 = (val // 0x10) + (0x10 * pal_idx)
-        newdata += struct.pack("<B", p1) + struct.pack("<B", p2)
-    return newdata
+    return unpack_pixels(data, 4, pal_idx)
 
 
 def twobpp_to_eightbpp(data: bytes | bytearray, pal_idx: int = 0):
-    newdata = bytearray()
-    for val in data:
-        p1 = (val & 0x4) + (0x4 * pal_idx)
-        p2 = ((val >> 2) & 0x4) + (0x4 * pal_idx)
-        p3 = ((val >> 4) & 0x4) + (0x4 * pal_idx)
-        p4 = ((val >> 6) & 0x4) + (0x4 * pal_idx)
-        newdata += (
-            struct.pack("<B", p1)
-            + struct.pack("<B", p2)
-            + struct.pack("<B", p3)
-            + struct.pack("<B", p4)
-        )
-    return newdata
+    return unpack_pixels(data, 2, pal_idx)
 
 
 def eightbpp_to_twobpp(data: bytes | bytearray):
-    newdata = bytearray()
-    it = iter(data)
-    for _ in range(len(data) // 4):
-        val1 = next(it) % 0x4
-        val2 = next(it) % 0x4
-        val3 = next(it) % 0x4
-        val4 = next(it) % 0x4
-        newdata += struct.pack("<B", (val4 << 6) + (val3 << 4) + (val2 << 2) + val1)
-    return newdata
+    return pack_pixels(data, 2)
+
+
+def onebpp_to_eightbpp(data: bytes | bytearray, pal_idx: int = 0):
+    return unpack_pixels(data, 1, pal_idx)
+
+
+def eightbpp_to_onebpp(data: bytes | bytearray):
+    return pack_pixels(data, 1)
 
 
 def convert_from_eightbpp(data: bytes | bytearray, bit_depth: int):
     """
-    Convert an 8 bytes per pixel data stream to an N bytes per pixel data stream, with N in [2, 4, 8].
+    Convert an 8 bytes per pixel data stream to an N bytes per pixel data stream, with N in [1, 2, 4, 8].
 
     :params data: A bytes stream.
     :params bit_depth: The bit depth the new stream should have.
 
     :returns: A new stream with the given bit depth.
     """
-    assert bit_depth in [2, 4, 8]
-    if bit_depth == 2:
-        return eightbpp_to_twobpp(data)
-    elif bit_depth == 4:
-        return eightbpp_to_fourbpp(data)
-    else:
+    assert bit_depth in [1, 2, 4, 8]
+    if bit_depth == 8:
         return data
+    return pack_pixels(data, bit_depth)
 
 
 def convert_to_eightbpp(data: bytes | bytearray, bit_depth: int, pal_idx: int = 0):
     """
-    Convert an N bytes per pixel data stream to an 8 bytes per pixel data stream, with N in [2, 4, 8].
+    Convert an N bytes per pixel data stream to an 8 bytes per pixel data stream, with N in [1, 2, 4, 8].
 
     :params data: A bytes stream.
     :params bit_depth: The bit depth the new stream should have.
     :params pal_idx: The palette idx the pixels should be pushed to. For example, if you convert a 4bpp stream to 8bpp with pal_idx = 1, the pixels with be written with values between 0x10 and 0x20.
     :returns: A new stream with a bit depth of 8.
     """
-    assert bit_depth in [2, 4, 8]
-    if bit_depth == 2:
-        return twobpp_to_eightbpp(data, pal_idx)
-    elif bit_depth == 4:
-        return fourbpp_to_eightbpp(data, pal_idx)
-    else:
+    assert bit_depth in [1, 2, 4, 8]
+    if bit_depth == 8:
         return data
+    return unpack_pixels(data, bit_depth, pal_idx)
+
+
+# For each (image size, OAM size) used so far, the linear position of each row of 8 pixels of
+# the tiled data, and the tiled position of each row of the image (-1 where no tile goes)
+SWIZZLE_TABLES = {}
+
+
+def swizzle_tables(im_size: tuple[int, int], OAM_size: tuple[int, int]):
+    tables = SWIZZLE_TABLES.get((im_size, OAM_size))
+    if tables is not None:
+        return tables
+
+    im_width, im_height = im_size
+    OAM_width, OAM_height = OAM_size
+    row_width = im_width // 8  # in rows of 8 pixels
+    tiled_rows = []
+    for block_y in range(0, im_height - OAM_height + 1, OAM_height):
+        for block_x in range(0, im_width - OAM_width + 1, OAM_width):
+            for tile_y in range(block_y, block_y + OAM_height, 8):
+                for tile_x in range(block_x // 8, (block_x + OAM_width) // 8):
+                    for y in range(tile_y, tile_y + 8):
+                        tiled_rows.append(y * row_width + tile_x)
+
+    linear_rows = [-1] * (row_width * im_height)
+    for tiled_pos, linear_pos in enumerate(tiled_rows):
+        linear_rows[linear_pos] = tiled_pos
+
+    tables = SWIZZLE_TABLES[(im_size, OAM_size)] = (tiled_rows, linear_rows)
+    return tables
+
+
+def tiled_to_linear(
+    data: bytes | bytearray, im_size: tuple[int, int], OAM_size: tuple[int, int] = (8, 8)
+) -> bytes:
+    """
+    Convert 8bpp tiled pixels to the pixels of the image, left/right top/bottom. Tiles are grouped
+    in OAMs of the given size, which fill the image left/right top/bottom, and so do the tiles in
+    an OAM. The rows of 8 pixels are moved at once, as 64 bits integers.
+
+    Pixels that no tile covers are 0, and extra tiles are ignored.
+
+    :params data: The tiled pixels, 1 byte each.
+    :params im_size: The size of the image, a multiple of 8.
+    :params OAM_size: The size of the OAMs.
+
+    :returns: The pixels of the image.
+    """
+    tiled_rows, linear_rows = swizzle_tables(im_size, OAM_size)
+    count = min(len(data) // 8, len(tiled_rows))
+    rows = array("Q", bytes(data[: count * 8]))
+    # missing tiles are 0, and so is the last row, which -1 gives
+    rows.extend(array("Q", bytes(8 * (len(tiled_rows) - count + 1))))
+    return array("Q", map(rows.__getitem__, linear_rows)).tobytes()
+
+
+def linear_to_tiled(
+    data: bytes | bytearray, im_size: tuple[int, int], OAM_size: tuple[int, int] = (8, 8)
+) -> bytes:
+    """
+    Convert the pixels of an image to 8bpp tiled pixels, the reverse of tiled_to_linear.
+    Only the OAMs that fit in the image are kept.
+    """
+    tiled_rows, _ = swizzle_tables(im_size, OAM_size)
+    rows = array("Q", bytes(data))
+    return array("Q", map(rows.__getitem__, tiled_rows)).tobytes()
 
 
 def empty_im(
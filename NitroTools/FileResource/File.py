@@ -1,33 +1,55 @@
 from NitroTools.FileSystem import (
     EndianBinaryReader,
-    EndianBinaryFileReader,
     EndianBinaryStreamReader,
+    EndianBinaryMappedReader,
 )
 from pathlib import Path
-from NitroTools.Compression import decompress, compress
+from NitroTools.Compression import decompress, compress, compress_best, probe
 
-FileInput = EndianBinaryReader | bytes | bytearray | str | Path
+FileInput = EndianBinaryReader | bytes | bytearray | memoryview | str | Path
+
+# The fields of the header of Nitro files, after the magic (see Schema)
+NITRO_HEADER_FIELDS = (
+    ("unk", "UInt32"),
+    ("filesize", "UInt32"),
+    ("header_size", "UInt16"),
+    ("section_count", "UInt16"),
+)
 
 
 class File:
     def __init__(self, inp: FileInput, no_decompress=False):
         self.compression = None
         if isinstance(inp, (str, Path)):
-            data = EndianBinaryFileReader(inp).read()
+            # the file is parsed from a mapping, instead of being read in memory. The mapping is
+            # closed right after, so the file can be written back to the same path
+            with EndianBinaryMappedReader(inp) as reader:
+                self.load(reader.read_view(), no_decompress)
+            return
+
+        elif isinstance(inp, EndianBinaryStreamReader):
+            data = inp.read_view()
 
         elif isinstance(inp, EndianBinaryReader):
             data = inp.read()
 
-        elif isinstance(inp, (bytes, bytearray)):
+        elif isinstance(inp, (bytes, bytearray, memoryview)):
             data = inp
 
         else:
             raise Exception("Invalid input. Expected a buffer or a filepath.")
-        if not no_decompress:
+        self.load(data, no_decompress)
+
+    def load(self, data: bytes | bytearray | memoryview, no_decompress=False):
+        """
+        Decompresses the data if needed, then reads it. The parsers copy what they keep, so the
+        data can be released afterwards.
+        """
+        if not no_decompress and probe(data):
             try:
                 data, compression = decompress(data)
                 self.compression = compression
-            except:
+            except ValueError:  # the data only looked compressed
                 pass
 
         self.read(EndianBinaryStreamReader(data))
@@ -44,13 +66,20 @@ class File:
         """
         raise Exception("The to_bytes method must be overwritten")
 
-    def write(self, filepath: str | Path) -> None:
+    def write(self, filepath: str | Path, workers: int = 1) -> None:
         """
-        Write the file to the given filepath.
+        Write the file to the given filepath. If the compression is "auto", all the codecs
+        are tried and the smallest output is written.
 
         :param filepath: The destination filepath.
+        :param workers: The number of processes that try the codecs when the compression is "auto"
+            (see compress_best). By default they run in this process, which needs no
+            if __name__ == "__main__" guard in the calling script.
         """
-        if self.compression:
+        if self.compression == "auto":
+            data, _, _ = compress_best(self.to_bytes(), workers=workers)
+            open(filepath, mode="wb").write(data)
+        elif self.compression:
             open(filepath, mode="wb").write(compress(self.to_bytes(), self.compression))
         else:
             open(filepath, mode="wb").write(self.to_bytes())
@@ -1,4 +1,10 @@
-from NitroTools.FileSystem import EndianBinaryReader, EndianBinaryStreamWriter
+from NitroTools.FileSystem import (
+    EndianBinaryReader,
+    EndianBinaryWriter,
+    EndianBinaryStreamWriter,
+    Schema,
+)
+from NitroTools.FileResource.File import NITRO_HEADER_FIELDS
 from NitroTools.FileResource.Graphics.Bitmap.Bitmap import Bitmap
 
 
@@ -13,11 +19,7 @@ class NCGR(Bitmap):
     """
 
     def read(self, f: EndianBinaryReader):
-        self.magic = f.check_magic(b"RGCN")
-        self.unk = f.read_UInt32()
-        self.filesize = f.read_UInt32()
-        self.header_size = f.read_UInt16()
-        self.section_count = f.read_UInt16()
+        NCGR_HEADER.read(f, self)
         assert self.section_count <= 2
         "Expected a number of sections <= 2"
         self.char = NCGR_CHAR(f)
@@ -62,19 +64,14 @@ class NCGR(Bitmap):
 
     def to_bytes(self):
         stream = EndianBinaryStreamWriter()
-        stream.write(self.magic)
-        stream.write_UInt32(self.unk)
-        stream.write_UInt32(0)
-        stream.write_UInt16(self.header_size)
-        stream.write_UInt16(self.section_count)
-        stream.write(self.char.to_bytes())
+        NCGR_HEADER.write(stream, self, filesize=0)
+        self.char.write_to(stream)
 
         if self.section_count == 2:
-            stream.write(self.cpos.to_bytes())
+            self.cpos.write_to(stream)
 
         self.filesize = stream.tell()
-        stream.seek(8)
-        stream.write_UInt32(self.filesize)
+        stream.patch(8, self.filesize)
 
         return stream.getvalue()
 
@@ -86,46 +83,29 @@ class NCGR_CHAR:
 
     def __init__(self, f: EndianBinaryReader):
         pos = f.tell()
-        self.magic = f.check_magic(b"RAHC")
-        self.section_size = f.read_UInt32()
-        self.height = f.read_Int16()
-        self.width = f.read_Int16()
-        self.bit_depth_val = f.read_UInt32()
+        NCGR_CHAR_HEADER.read(f, self)
         assert self.bit_depth_val in [3, 4]
         if self.bit_depth_val == 3:
             self.bit_depth = 4
         else:
             self.bit_depth = 8
-        self.unk_height = f.read_Int16()
-        self.unk_width = f.read_Int16()
-        self.linear_flag = f.read_UInt8()
-        self.partition_flag = f.read_UInt8()
-        self.unk = f.read_UInt16()
-        self.data_size = f.read_UInt32()
-        self.data_offset = f.read_UInt32()
         f.seek(pos + self.data_offset + 8)
         self.data = f.read(self.data_size)
 
+    def write_to(self, f: EndianBinaryWriter):
+        """
+        Writes the section to the stream f, and patches its size once it's written.
+        """
+        start = f.tell()
+        NCGR_CHAR_HEADER.write(f, self, section_size=0)
+        f.write(self.data)
+
+        self.section_size = f.tell() - start
+        f.patch(start + 4, self.section_size)
+
     def to_bytes(self):
         stream = EndianBinaryStreamWriter()
-        stream.write(self.magic)
-        stream.write_UInt32(0)
-        stream.write_Int16(self.height)
-        stream.write_Int16(self.width)
-        stream.write_UInt32(self.bit_depth_val)
-        stream.write_Int16(self.unk_height)
-        stream.write_Int16(self.unk_width)
-        stream.write_UInt8(self.linear_flag)
-        stream.write_UInt8(self.partition_flag)
-        stream.write_UInt16(self.unk)
-        stream.write_UInt32(self.data_size)
-        stream.write_UInt32(self.data_offset)
-        stream.write(self.data)
-
-        self.section_size = stream.tell()
-        stream.seek(4)
-        stream.write_UInt32(self.section_size)
-
+        self.write_to(stream)
         return stream.getvalue()
 
 
@@ -135,17 +115,36 @@ class NCGR_CPOS:
     """
 
     def __init__(self, f: EndianBinaryReader):
-        self.magic = f.check_magic(b"SOPC")
-        self.section_size = f.read_UInt32()
-        self.unknown = f.read_UInt32()
-        self.char_size = f.read_UInt16()
-        self.char_count = f.read_UInt16()
+        NCGR_CPOS_HEADER.read(f, self)
+
+    def write_to(self, f: EndianBinaryWriter):
+        NCGR_CPOS_HEADER.write(f, self)
 
     def to_bytes(self):
-        stream = EndianBinaryStreamWriter()
-        stream.write(self.magic)
-        stream.write_UInt32(self.section_size)
-        stream.write_UInt32(self.unknown)
-        stream.write_UInt16(self.char_size)
-        stream.write_UInt16(self.char_count)
-        return stream.getvalue()
+        return NCGR_CPOS_HEADER.pack(self)
+
+
+NCGR_HEADER = Schema(*NITRO_HEADER_FIELDS, magic=b"RGCN")
+
+NCGR_CHAR_HEADER = Schema(
+    ("section_size", "UInt32"),
+    ("height", "Int16"),
+    ("width", "Int16"),
+    ("bit_depth_val", "UInt32"),
+    ("unk_height", "Int16"),
+    ("unk_width", "Int16"),
+    ("linear_flag", "UInt8"),
+    ("partition_flag", "UInt8"),
+    ("unk", "UInt16"),
+    ("data_size", "UInt32"),
+    ("data_offset", "UInt32"),
+    magic=b"RAHC",
+)
+
+NCGR_CPOS_HEADER = Schema(
+    ("section_size", "UInt32"),
+    ("unknown", "UInt32"),
+    ("char_size", "UInt16"),
+    ("char_count", "UInt16"),
+    magic=b"SOPC",
+)
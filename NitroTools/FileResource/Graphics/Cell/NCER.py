@@ -1,8 +1,13 @@
-from NitroTools.FileSystem import EndianBinaryReader, EndianBinaryStreamWriter
+from NitroTools.FileSystem import (
+    EndianBinaryReader,
+    EndianBinaryWriter,
+    EndianBinaryStreamWriter,
+    Schema,
+)
 from NitroTools.FileResource.Common import Tile, OAM
 import struct
 import json
-from NitroTools.FileResource.File import File
+from NitroTools.FileResource.File import File, NITRO_HEADER_FIELDS
 
 
 class NCER(File):
@@ -15,11 +20,7 @@ class NCER(File):
     """
 
     def read(self, f):
-        self.magic = f.check_magic(b"RECN")
-        self.unk = f.read_UInt32()
-        self.filesize = f.read_UInt32()
-        self.header_size = f.read_UInt16()
-        self.section_count = f.read_UInt16()
+        NCER_HEADER.read(f, self)
         self.cebk = NCER_CEBK(f)
 
         if self.section_count >= 2:
@@ -30,22 +31,17 @@ class NCER(File):
 
     def to_bytes(self):
         stream = EndianBinaryStreamWriter()
-        stream.write(self.magic)
-        stream.write_UInt32(self.unk)
-        stream.write_UInt32(0)
-        stream.write_UInt16(self.header_size)
-        stream.write_UInt16(self.section_count)
-        stream.write(self.cebk.to_bytes())
+        NCER_HEADER.write(stream, self, filesize=0)
+        self.cebk.write_to(stream)
 
         if self.section_count >= 2:
-            stream.write(self.labl.to_bytes())
+            self.labl.write_to(stream)
 
         if self.section_count >= 3:
-            stream.write(self.uext.to_bytes())
+            self.uext.write_to(stream)
 
         self.filesize = stream.tell()
-        stream.seek(8)
-        stream.write_UInt32(self.filesize)
+        stream.patch(8, self.filesize)
 
         return stream.getvalue()
 
@@ -57,24 +53,16 @@ class NCER_CEBK:
 
     def __init__(self, f: EndianBinaryReader):
         pos = f.tell()
-        self.magic = f.check_magic(b"KBEC")
-        self.section_size = f.read_UInt32()
-        self.cell_count = f.read_UInt16()
-        self.extended_flag = f.read_UInt16()
-        self.data_offset = f.read_UInt32()
-        flags = f.read_UInt32()
-        self.tile_index_offset = (flags & 0b11) << 1
-        self.sub_image_flag = flags >> 2 & 1
-        self.partition_data_offset = f.read_UInt32()
-        f.read(8)
+        NCER_CEBK_HEADER.read(f, self)
+        self.tile_index_offset = (self.flags & 0b11) << 1
+        self.sub_image_flag = self.flags >> 2 & 1
 
         self.cells = [CEBK_Cell(f, self.extended_flag) for _ in range(self.cell_count)]
         for cell in self.cells:
             cell.read_OAM_data(f)
 
         if self.partition_data_offset:
-            self.partition_start = f.read_UInt32()
-            self.partition_size = f.read_UInt32()
+            CEBK_PARTITION.read(f, self)
 
         f.seek(pos + self.section_size)
 
@@ -105,41 +93,33 @@ class NCER_CEBK:
             out, open(json_filepath, mode="w", encoding="utf-8", newline=""), indent=3
         )
 
-    def to_bytes(self):
-        stream = EndianBinaryStreamWriter()
-        stream.write(self.magic)
-        stream.write_UInt32(0)
-        stream.write_UInt16(self.cell_count)
-        stream.write_UInt16(self.extended_flag)
-        stream.write_UInt32(self.data_offset)
-        stream.write_UInt32((self.tile_index_offset >> 1) + (self.sub_image_flag << 2))
-        stream.write_UInt32(self.partition_data_offset)
-        stream.write(bytes(8))
+    def write_to(self, f: EndianBinaryWriter):
+        """
+        Writes the section to the stream f, and patches its size once it's written.
+        """
+        self.flags = (self.tile_index_offset >> 1) + (self.sub_image_flag << 2)
+        start = f.tell()
+        NCER_CEBK_HEADER.write(f, self, section_size=0)
 
+        cell_schema = CEBK_CELL_EXTENDED if self.extended_flag else CEBK_CELL
         data_offset = 0
         for cell in self.cells:
-            stream.write_UInt16(cell.OAM_count)
-            stream.write_UInt16(cell.unk)
-            stream.write_UInt32(data_offset)
-            if self.extended_flag:
-                stream.write_Int16(cell.xmax)
-                stream.write_Int16(cell.ymax)
-                stream.write_Int16(cell.xmin)
-                stream.write_Int16(cell.ymin)
+            cell_schema.write(f, cell, OAM_offset=data_offset)
             data_offset += cell.OAM_count * 6
 
         for cell in self.cells:
             for oam in cell.OAM_data_list:
-                stream.write(oam.to_bytes())
+                f.write(oam.to_bytes())
 
         if self.partition_data_offset:
-            stream.write_UInt32(self.partition_start)
-            stream.write_UInt32(self.partition_size)
+            CEBK_PARTITION.write(f, self)
 
-        self.section_size = stream.tell()
-        stream.seek(4)
-        stream.write_UInt32(self.section_size)
+        self.section_size = f.tell() - start
+        f.patch(start + 4, self.section_size)
 
+    def to_bytes(self):
+        stream = EndianBinaryStreamWriter()
+        self.write_to(stream)
         return stream.getvalue()
 
 
@@ -150,14 +130,10 @@ class CEBK_Cell:
 
     def __init__(self, f: EndianBinaryReader, extended_flag: bool):
         self.extended_flag = extended_flag
-        self.OAM_count = f.read_UInt16()
-        self.unk = f.read_UInt16()
-        self.OAM_offset = f.read_UInt32()
         if self.extended_flag:
-            self.xmax = f.read_Int16()
-            self.ymax = f.read_Int16()
-            self.xmin = f.read_Int16()
-            self.ymin = f.read_Int16()
+            CEBK_CELL_EXTENDED.read(f, self)
+        else:
+            CEBK_CELL.read(f, self)
 
     def read_OAM_data(self, f: EndianBinaryReader):
         self.OAM_data_list = [OAMData(f) for _ in range(self.OAM_count)]
@@ -169,7 +145,7 @@ class OAMData:
     """
 
     def __init__(self, f: EndianBinaryReader):
-        chunk0 = f.read_UInt16()
+        chunk0, chunk1, chunk2 = OAM_DATA.unpack(f)
         self.size_type = chunk0 >> 14
         self.color_depth = chunk0 >> 13 & 1
         self.mosaic_flag = chunk0 >> 12 & 1
@@ -179,7 +155,6 @@ class OAMData:
         pos_bytes = struct.pack("<B", chunk0 & (2**8 - 1))
         self.y_pos = struct.unpack("<b", pos_bytes)[0]
 
-        chunk1 = f.read_UInt16()
         self.size_info = chunk1 >> 14
         self.ver_flip = chunk1 >> 13 & 1
         self.hor_flip = chunk1 >> 12 & 1
@@ -189,7 +164,6 @@ class OAMData:
         else:
             self.x_pos = x_pos_val
 
-        chunk2 = f.read_UInt16()
         self.pal_idx = chunk2 >> 12
         self.priority = chunk2 >> 10 & 0b11
         self.tile_index = chunk2 & (2**10 - 1)
@@ -232,12 +206,7 @@ class OAMData:
 
         chunk2 = (self.pal_idx << 12) + (self.priority << 10) + self.tile_index
 
-        stream = EndianBinaryStreamWriter()
-        stream.write_UInt16(chunk0)
-        stream.write_UInt16(chunk1)
-        stream.write_UInt16(chunk2)
-
-        return stream.getvalue()
+        return OAM_DATA.pack(chunk0=chunk0, chunk1=chunk1, chunk2=chunk2)
 
 
 class NCER_LABL:
@@ -266,21 +235,23 @@ class NCER_LABL:
 
         f.seek(pos + self.section_size)
 
-    def to_bytes(self):
-        stream = EndianBinaryStreamWriter()
-        stream.write(self.magic)
-        stream.write_UInt32(0)
+    def write_to(self, f: EndianBinaryWriter):
+        start = f.tell()
+        f.write(self.magic)
+        size_offset = f.reserve("UInt32")
         name_offset = 0
         for name in self.cell_names:
-            stream.write_UInt32(name_offset)
+            f.write_UInt32(name_offset)
             name_offset += len(name) + 1
         for name in self.cell_names:
-            stream.write(name + b"\x00")
+            f.write(name + b"\x00")
 
-        self.section_size = stream.tell()
-        stream.seek(4)
-        stream.write_UInt32(self.section_size)
+        self.section_size = f.tell() - start
+        f.patch(size_offset, self.section_size)
 
+    def to_bytes(self):
+        stream = EndianBinaryStreamWriter()
+        self.write_to(stream)
         return stream.getvalue()
 
 
@@ -294,12 +265,45 @@ class NCER_UEXT:
         self.section_size = f.read_UInt32()
         self.unk = f.read_UInt32()
 
+    def write_to(self, f: EndianBinaryWriter):
+        f.write(self.magic)
+        f.write_UInt32(self.section_size)
+        f.write_UInt32(self.unk)
+
     def to_bytes(self):
         stream = EndianBinaryStreamWriter()
-        stream.write(self.magic)
-        stream.write_UInt32(self.section_size)
-        stream.write_UInt32(self.unk)
+        self.write_to(stream)
+        return stream.getvalue()
+
+
+NCER_HEADER = Schema(*NITRO_HEADER_FIELDS, magic=b"RECN")
+
+NCER_CEBK_HEADER = Schema(
+    ("section_size", "UInt32"),
+    ("cell_count", "UInt16"),
+    ("extended_flag", "UInt16"),
+    ("data_offset", "UInt32"),
+    ("flags", "UInt32"),
+    ("partition_data_offset", "UInt32"),
+    (None, 8),
+    magic=b"KBEC",
+)
+
+CEBK_PARTITION = Schema(("partition_start", "UInt32"), ("partition_size", "UInt32"))
+
+CEBK_CELL = Schema(("OAM_count", "UInt16"), ("unk", "UInt16"), ("OAM_offset", "UInt32"))
+
+CEBK_CELL_EXTENDED = Schema(
+    ("OAM_count", "UInt16"),
+    ("unk", "UInt16"),
+    ("OAM_offset", "UInt32"),
+    ("xmax", "Int16"),
+    ("ymax", "Int16"),
+    ("xmin", "Int16"),
+    ("ymin", "Int16"),
+)
 
+OAM_DATA = Schema(("chunk0", "UInt16"), ("chunk1", "UInt16"), ("chunk2", "UInt16"))
 
 OAM_SIZE_DICT = {
     (0, 0): (8, 8),
@@ -4,12 +4,14 @@ from NitroTools.FileResource.Graphics.Tilemap import *
 from NitroTools.FileResource.Graphics.Cell import *
 from PIL import Image
 from NitroTools.FileResource.Common import (
-    Tile,
+    TileSheet,
     OAM,
     paste_alpha,
     convert_from_eightbpp,
     convert_to_eightbpp,
     empty_im,
+    tiled_to_linear,
+    linear_to_tiled,
 )
 
 
@@ -141,18 +143,13 @@ class ImageCanva:
         """
         self.transparency = transparency
 
-    def generate_tile_list(self):
+    def generate_tile_list(self) -> TileSheet:
         """
         Generate tiles from the loaded Bitmap.
+
+        :returns: A TileSheet holding a copy of the Bitmap data, which can be used as a list of tiles.
         """
-        tile_datasize = self.bit_depth * 8
-        data = self.Bitmap.get_data()
-        tile_count = len(data) // tile_datasize
-        tiles = [
-            Tile(data[tile_datasize * idx : tile_datasize * (idx + 1)], self.bit_depth)
-            for idx in range(tile_count)
-        ]
-        return tiles
+        return TileSheet(self.Bitmap.get_data(), self.bit_depth)
 
     def build_hor_image(self, pal_idx: int = 0):
         """
@@ -161,25 +158,14 @@ class ImageCanva:
         :params pal_idx: The index of the subpalette the image should follow. It is useful if the same Bitmap has several colorings,
         for example for an animation.
         """
-        OAM_width_count = self.im_width // self.OAM_width
-        OAM_height_count = self.im_height // self.OAM_height
         im = empty_im(
             self.im_size, self.Palette.get_colors(), self.bit_depth, self.transparency
         )
-        tile_idx = 0
-        tiles = self.generate_tile_list()
-        tile_count_par_OAM = (self.OAM_width // 8) * (self.OAM_height // 8)
-        for j in range(OAM_height_count):
-            for i in range(OAM_width_count):
-                oam = OAM(
-                    tiles[tile_idx : tile_idx + tile_count_par_OAM],
-                    self.OAM_size,
-                    pal_idx,
-                    self.bit_depth,
-                    False,
-                )
-                tile_idx += tile_count_par_OAM
-                im.paste(oam.image, (i * self.OAM_width, j * self.OAM_height))
+        # the whole bitmap is converted and untiled at once
+        eightbpp_data = convert_to_eightbpp(
+            self.Bitmap.get_data(), self.bit_depth, pal_idx
+        )
+        im.frombytes(tiled_to_linear(eightbpp_data, self.im_size, self.OAM_size))
         return [im]
 
     def build_linear_image(self, pal_idx: int):
@@ -206,12 +192,7 @@ class ImageCanva:
             self.im_size, self.Palette.get_colors(), self.bit_depth, self.transparency
         )
         tiles = self.generate_tile_list()
-        maps = iter(self.Tilemap.get_mapdata())
-        for j in range(im.height // 8):
-            for i in range(im.width // 8):
-                map = next(maps)
-                tile_im = map.get_tile_im(tiles)
-                im.paste(tile_im, (i * 8, j * 8))
+        im.frombytes(tiles.render_tilemap(self.Tilemap.get_mapvalues(), self.im_size))
         return [im]
 
     def build_cells(self):
@@ -337,8 +318,8 @@ class ImageCanva:
                     (
                         OAM_data.x_pos - min_x,
                         OAM_data.y_pos - min_y,
-                        OAM_data.x_pos + OAM_data.oam.width - min_x,
-                        OAM_data.y_pos + OAM_data.oam.height - min_y,
+                        OAM_data.x_pos + OAM_data.size[0] - min_x,
+                        OAM_data.y_pos + OAM_data.size[1] - min_y,
                     )
                 ),
                 OAM_data.size,
@@ -346,7 +327,7 @@ class ImageCanva:
                 self.bit_depth,
                 self.linear,
             )
-            new_tiles = OAM.get_tiles()
+            new_tiles = oam.get_tiles()
 
             if self.bit_depth == 4:
                 tile_offset = OAM_data.tile_index * self.Cell.cebk.tile_index_offset
@@ -357,11 +338,7 @@ class ImageCanva:
 
             self.tiles[tile_offset : tile_offset + oam.tile_count] = new_tiles
 
-        newdata = bytearray()
-        for tile in self.tiles:
-            newdata += tile.to_bytes()
-
-        self.Bitmap.set_data(newdata)
+        self.Bitmap.set_data(self.tiles.to_bytes())
         self.Palette.set_colors(colors)
 
     def import_image_with_tilemap(self, im: Image.Image):
@@ -407,24 +384,9 @@ class ImageCanva:
         :params im: The Image.
         """
         colors = im.getpalette()
-        data = bytearray()
-        for j in range(im.height // self.OAM_height):
-            for i in range(im.width // self.OAM_width):
-                oam = OAM(
-                    im.crop(
-                        (
-                            i * self.OAM_width,
-                            j * self.OAM_height,
-                            (i + 1) * self.OAM_width,
-                            (j + 1) * self.OAM_height,
-                        )
-                    ),
-                    self.OAM_size,
-                    0,
-                    self.bit_depth,
-                    False,
-                )
-                data += oam.to_bytes()
+        data = convert_from_eightbpp(
+            linear_to_tiled(im.tobytes(), im.size, self.OAM_size), self.bit_depth
+        )
         self.Bitmap.set_data(data)
         self.Bitmap.set_im_size(im.size)
         self.Palette.set_colors(colors)
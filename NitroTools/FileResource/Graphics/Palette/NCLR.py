@@ -1,4 +1,12 @@
-from NitroTools.FileSystem import EndianBinaryReader, EndianBinaryStreamWriter
+from NitroTools.FileSystem import (
+    EndianBinaryReader,
+    EndianBinaryWriter,
+    EndianBinaryStreamWriter,
+    Schema,
+    decode_palette,
+    encode_palette,
+)
+from NitroTools.FileResource.File import NITRO_HEADER_FIELDS
 from NitroTools.FileResource.Graphics.Palette.Palette import Palette
 from math import ceil
 
@@ -13,11 +21,7 @@ class NCLR(Palette):
     """
 
     def read(self, f: EndianBinaryReader):
-        self.magic = f.check_magic(b"RLCN")
-        self.unk = f.read_UInt32()
-        self.filesize = f.read_UInt32()
-        self.header_size = f.read_UInt16()
-        self.section_count = f.read_UInt16()
+        NCLR_HEADER.read(f, self)
         self.pltt = NCLR_PLTT(f)
         if self.section_count == 2:
             self.pcmp = NCLR_PCMP(f)
@@ -55,19 +59,14 @@ class NCLR(Palette):
 
     def to_bytes(self):
         stream = EndianBinaryStreamWriter()
-        stream.write(self.magic)
-        stream.write_UInt32(self.unk)
-        stream.write_UInt32(0)
-        stream.write_UInt16(self.header_size)
-        stream.write_UInt16(self.section_count)
-        stream.write(self.pltt.to_bytes())
+        NCLR_HEADER.write(stream, self, filesize=0)
+        self.pltt.write_to(stream)
 
         if self.section_count == 2:
-            stream.write(self.pcmp.to_bytes())
+            self.pcmp.write_to(stream)
 
         self.filesize = stream.tell()
-        stream.seek(8)
-        stream.write_UInt32(self.filesize)
+        stream.patch(8, self.filesize)
 
         return stream.getvalue()
 
@@ -78,37 +77,27 @@ class NCLR_PLTT:
     """
 
     def __init__(self, f: EndianBinaryReader):
-        self.magic = f.check_magic(b"TTLP")
-        self.section_size = f.read_UInt32()
-        self.bit_depth_val = f.read_UInt16()
+        NCLR_PLTT_HEADER.read(f, self)
         if self.bit_depth_val == 3:
             self.bit_depth = 4
         elif self.bit_depth_val == 4:
             self.bit_depth = 8
-        self.unk1 = f.read_UInt16()
-        self.unk2 = f.read_UInt32()
-        self.data_size = f.read_UInt32()
-        self.data_offset = f.read_UInt32()
-        self.colors = []
-        for _ in range(self.data_size // 2):
-            self.colors += f.read_palette_color()
+        self.colors = list(decode_palette(f.read(self.data_size // 2 * 2)))
+
+    def write_to(self, f: EndianBinaryWriter):
+        """
+        Writes the section to the stream f, and patches its size once it's written.
+        """
+        start = f.tell()
+        NCLR_PLTT_HEADER.write(f, self, section_size=0)
+        f.write(encode_palette(self.colors))
+
+        self.section_size = f.tell() - start
+        f.patch(start + 4, self.section_size)
 
     def to_bytes(self):
         stream = EndianBinaryStreamWriter()
-        stream.write(self.magic)
-        stream.write_UInt32(0)
-        stream.write_UInt16(self.bit_depth_val)
-        stream.write_UInt16(self.unk1)
-        stream.write_UInt32(self.unk2)
-        stream.write_UInt32(self.data_size)
-        stream.write_UInt32(self.data_offset)
-        for i in range(len(self.colors) // 3):
-            stream.write_palette_color(self.colors[3 * i : 3 * i + 3])
-
-        self.section_size = stream.tell()
-        stream.seek(4)
-        stream.write_UInt32(self.section_size)
-
+        self.write_to(stream)
         return stream.getvalue()
 
 
@@ -118,25 +107,40 @@ class NCLR_PCMP:
     """
 
     def __init__(self, f: EndianBinaryReader):
-        self.magic = f.check_magic(b"PMCP")
-        self.section_size = f.read_UInt32()
-        self.palette_count = f.read_UInt16()
-        self.constant1 = f.read_UInt16()
-        self.constant2 = f.read_UInt32()
-        self.palettes_indexes = [f.read_UInt16() for _ in range(self.palette_count)]
+        NCLR_PCMP_HEADER.read(f, self)
+        self.palettes_indexes = f.read_UInt16_array(self.palette_count).tolist()
 
-    def to_bytes(self):
-        stream = EndianBinaryStreamWriter()
-        stream.write(self.magic)
-        stream.write_UInt32(0)
-        stream.write_UInt16(self.palette_count)
-        stream.write_UInt16(self.constant1)
-        stream.write_UInt32(self.constant2)
+    def write_to(self, f: EndianBinaryWriter):
+        start = f.tell()
+        NCLR_PCMP_HEADER.write(f, self, section_size=0)
         for idx in self.palettes_indexes:
-            stream.write_UInt16(idx)
+            f.write_UInt16(idx)
 
-        self.section_size = stream.tell()
-        stream.seek(4)
-        stream.write_UInt32(self.section_size)
+        self.section_size = f.tell() - start
+        f.patch(start + 4, self.section_size)
 
+    def to_bytes(self):
+        stream = EndianBinaryStreamWriter()
+        self.write_to(stream)
         return stream.getvalue()
+
+
+NCLR_HEADER = Schema(*NITRO_HEADER_FIELDS, magic=b"RLCN")
+
+NCLR_PLTT_HEADER = Schema(
+    ("section_size", "UInt32"),
+    ("bit_depth_val", "UInt16"),
+    ("unk1", "UInt16"),
+    ("unk2", "UInt32"),
+    ("data_size", "UInt32"),
+    ("data_offset", "UInt32"),
+    magic=b"TTLP",
+)
+
+NCLR_PCMP_HEADER = Schema(
+    ("section_size", "UInt32"),
+    ("palette_count", "UInt16"),
+    ("constant1", "UInt16"),
+    ("constant2", "UInt32"),
+    magic=b"PMCP",
+)
@@ -1,4 +1,4 @@
-from NitroTools.FileSystem import EndianBinaryReader, EndianBinaryStreamWriter
+from NitroTools.FileSystem import EndianBinaryReader, decode_palette, encode_palette
 from NitroTools.FileResource.Graphics.Palette.Palette import Palette
 
 
@@ -16,12 +16,9 @@ class RawPalette(Palette):
     """
 
     def read(self, f: EndianBinaryReader):
-        f.seek(0, 2)
-        self.color_count = f.tell() // 2
-        f.seek(0)
-        self.colors = []
-        for _ in range(self.color_count):
-            self.colors.extend(f.read_palette_color())
+        data = f.read()
+        self.color_count = len(data) // 2
+        self.colors = list(decode_palette(data))
 
     def get_colors(self):
         if (
@@ -38,7 +35,4 @@ class RawPalette(Palette):
             self.colors = colors
 
     def to_bytes(self):
-        f = EndianBinaryStreamWriter()
-        for i in range(len(self.colors) // 3):
-            f.write_palette_color(self.colors[3 * i : 3 * i + 3])
-        return f.getvalue()
+        return encode_palette(self.colors)
@@ -1,4 +1,10 @@
-from NitroTools.FileSystem import EndianBinaryReader, EndianBinaryStreamWriter
+from NitroTools.FileSystem import (
+    EndianBinaryReader,
+    EndianBinaryWriter,
+    EndianBinaryStreamWriter,
+    Schema,
+)
+from NitroTools.FileResource.File import NITRO_HEADER_FIELDS
 from NitroTools.FileResource.Graphics.Tilemap.Tilemap import Tilemap, MapData
 
 
@@ -12,11 +18,7 @@ class NSCR(Tilemap):
     """
 
     def read(self, f: EndianBinaryReader):
-        self.magic = f.check_magic(b"RCSN")
-        self.unk = f.read_UInt32()
-        self.filesize = f.read_UInt32()
-        self.header_size = f.read_UInt16()
-        self.section_count = f.read_UInt16()
+        NSCR_HEADER.read(f, self)
         assert self.section_count == 1
         self.scrn = NSCR_SCRN(f)
 
@@ -35,16 +37,13 @@ class NSCR(Tilemap):
 
     def to_bytes(self):
         stream = EndianBinaryStreamWriter()
-        stream.write(self.magic)
-        stream.write_UInt32(self.unk)
-        stream.write_UInt32(0)
-        stream.write_UInt16(self.header_size)
-        stream.write_UInt16(self.section_count)
-        stream.write(self.scrn.to_bytes())
+        NSCR_HEADER.write(stream, self, filesize=0)
+        self.scrn.write_to(stream)
 
         self.filesize = stream.tell()
-        stream.seek(8)
-        stream.write_UInt32(self.filesize)
+        stream.patch(8, self.filesize)
+
+        return stream.getvalue()
 
 
 class NSCR_SCRN:
@@ -53,27 +52,34 @@ class NSCR_SCRN:
     """
 
     def __init__(self, f: EndianBinaryReader):
-        self.magic = f.check_magic(b"NRCS")
-        self.section_size = f.read_UInt32()
-        self.im_width = f.read_UInt16()
-        self.im_height = f.read_UInt16()
-        self.unk = f.read_UInt32()
-        self.mapdata_size = f.read_UInt32()
-        self.mapdata = [MapData(f) for _ in range(self.mapdata_size // 2)]
+        NSCR_SCRN_HEADER.read(f, self)
+        self.mapdata = list(map(MapData.from_value, f.read_UInt16_array(self.mapdata_size // 2)))
+
+    def write_to(self, f: EndianBinaryWriter):
+        """
+        Writes the section to the stream f, and patches its size once it's written.
+        """
+        start = f.tell()
+        NSCR_SCRN_HEADER.write(f, self, section_size=0)
+        for data in self.mapdata:
+            data.write_to(f)
+
+        self.section_size = f.tell() - start
+        f.patch(start + 4, self.section_size)
 
     def to_bytes(self):
         stream = EndianBinaryStreamWriter()
-        stream.write(self.magic)
-        stream.write_UInt32(0)
-        stream.write_UInt16(self.im_width)
-        stream.write_UInt16(self.im_height)
-        stream.write_UInt32(self.unk)
-        stream.write_UInt32(self.mapdata_size)
-        for data in self.mapdata:
-            data.write_to(stream)
+        self.write_to(stream)
+        return stream.getvalue()
 
-        self.section_size = stream.tell()
-        stream.seek(4)
-        stream.write_UInt32(self.section_size)
 
-        return stream.getvalue()
+NSCR_HEADER = Schema(*NITRO_HEADER_FIELDS, magic=b"RCSN")
+
+NSCR_SCRN_HEADER = Schema(
+    ("section_size", "UInt32"),
+    ("im_width", "UInt16"),
+    ("im_height", "UInt16"),
+    ("unk", "UInt32"),
+    ("mapdata_size", "UInt32"),
+    magic=b"NRCS",
+)
@@ -1,6 +1,6 @@
 from NitroTools.FileResource.File import File
 from NitroTools.FileSystem import EndianBinaryReader, EndianBinaryWriter
-from NitroTools.FileResource.Common import Tile
+from NitroTools.FileResource.Common import Tile, TileSheet
 from PIL import Image
 
 
@@ -13,34 +13,45 @@ class MapData:
         self.flip_top_bottom = False
         self.flip_left_right = False
         if f is not None:
-            data = f.read_UInt16()
-            self.pal_idx = data // 0x1000
-            data -= self.pal_idx * 0x1000
-            if data >= 0x800:
-                data -= 0x800
-                self.flip_top_bottom = True
-            if data >= 0x400:
-                data -= 0x400
-                self.flip_left_right = True
-            self.tile_idx = data
+            self.decode(f.read_UInt16())
 
-    def write_to(self, f: EndianBinaryWriter) -> None:
+    @classmethod
+    def from_value(cls, value: int) -> "MapData":
         """
-        Writes the MapInfo data to the stream f.
+        Returns the MapData stored in the 16 bits value, for tilemaps read at once (see read_UInt16_array).
         """
-        data = self.pal_idx * 0x1000
+        mapdata = cls()
+        mapdata.decode(value)
+        return mapdata
+
+    def decode(self, value: int) -> None:
+        self.pal_idx = value >> 12
+        self.flip_top_bottom = bool(value & 0x800)
+        self.flip_left_right = bool(value & 0x400)
+        self.tile_idx = value & 0x3FF
+
+    def encode(self) -> int:
+        """
+        Returns the 16 bits value of the MapData, the reverse of decode.
+        """
+        value = self.pal_idx * 0x1000
         if self.flip_top_bottom:
-            data += 0x800
+            value += 0x800
         if self.flip_left_right:
-            data += 0x400
-        data += self.tile_idx
-        f.write_UInt16(data)
+            value += 0x400
+        return value + self.tile_idx
+
+    def write_to(self, f: EndianBinaryWriter) -> None:
+        """
+        Writes the MapInfo data to the stream f.
+        """
+        f.write_UInt16(self.encode())
 
-    def get_tile_im(self, tiles: list[Tile]):
+    def get_tile_im(self, tiles: list[Tile] | TileSheet):
         """
         Returns a PIL Image representing the tile defined by this.
 
-        :param tiles: A list of Tiles, generated from the Bitmap file associated to the Tilemap file.
+        :param tiles: A list of Tiles or a TileSheet, generated from the Bitmap file associated to the Tilemap file.
 
         :returns: A 8x8 PIL Image representing the tile.
         """
@@ -73,6 +84,12 @@ class Tilemap(File):
         """
         pass
 
+    def get_mapvalues(self) -> list[int]:
+        """
+        Returns tile mapping data as the 16 bits value of each MapData, as stored in the file.
+        """
+        return [mapdata.encode() for mapdata in self.get_mapdata()]
+
     def get_im_size(self) -> tuple[int, int]:
         """
         Returns the image size of the file (if it's defined).
@@ -1,5 +1,5 @@
-from NitroTools.FileSystem import EndianBinaryReader
-from NitroTools.FileResource.File import File
+from NitroTools.FileSystem import EndianBinaryReader, Schema
+from NitroTools.FileResource.File import File, NITRO_HEADER_FIELDS
 import os
 from pathlib import Path
 from NitroTools.FileResource.Sound.SWAR import SWAR
@@ -11,24 +11,11 @@ class SDAT(File):
     """
 
     def read(self, f: EndianBinaryReader):
-        self.magic = f.check_magic(b"SDAT")
-        self.unk = f.read_UInt32()
-        self.filesize = f.read_UInt32()
-        self.header_size = f.read_UInt16()
-        self.section_count = f.read_UInt16()
+        SDAT_HEADER.read(f, self)
         assert (
             self.section_count == 4
         ), f"Unsupported SDAT format with {self.section_count} sections"
 
-        self.symb_offset = f.read_UInt32()
-        self.symb_size = f.read_UInt32()
-        self.info_offset = f.read_UInt32()
-        self.info_size = f.read_UInt32()
-        self.fat_offset = f.read_UInt32()
-        self.fat_size = f.read_UInt32()
-        self.data_offset = f.read_UInt32()
-        self.data_size = f.read_UInt32()
-
         f.seek(self.symb_offset)
         self.symb = SDAT_SYMB(f)
 
@@ -88,8 +75,7 @@ class SDAT_SYMB:
 
     def __init__(self, f: EndianBinaryReader):
         self.start_offset = f.tell()
-        self.magic = f.check_magic(b"SYMB")
-        self.section_size = f.read_UInt32()
+        SDAT_SYMB_HEADER.read(f, self)
         entries = [self.read_entry(f) for _ in range(8)]
         (
             self.sseq_names,
@@ -107,7 +93,7 @@ class SDAT_SYMB:
         pos = f.tell()
         f.seek(names_table_offset + self.start_offset)
         entry_count = f.read_UInt32()
-        name_offsets = [f.read_UInt32() for _ in range(entry_count)]
+        name_offsets = f.read_UInt32_array(entry_count).tolist()
         names = []
         for offset in name_offsets:
             if offset != 0:
@@ -123,7 +109,7 @@ class SYMB_Entry:
         pos = f.tell()
         f.seek(self.names_table_offset + start_offset)
         self.entry_count = f.read_UInt32()
-        self.name_offsets = [f.read_UInt32() for _ in range(self.entry_count)]
+        self.name_offsets = f.read_UInt32_array(self.entry_count).tolist()
         self.names = []
         for offset in self.name_offsets:
             f.seek(offset + start_offset)
@@ -138,8 +124,7 @@ class SDAT_INFO:
 
     def __init__(self, f: EndianBinaryReader):
         self.start_offset = f.tell()
-        self.magic = f.check_magic(b"INFO")
-        self.section_size = f.read_UInt32()
+        SDAT_INFO_HEADER.read(f, self)
         self.sseq_info: list[SSEQ_INFO] = self.read_entry(f, SSEQ_INFO)
         self.ssar_info: list[SSAR_INFO] = self.read_entry(f, SSAR_INFO)
         self.sbnk_info: list[SBNK_INFO] = self.read_entry(f, SBNK_INFO)
@@ -154,7 +139,7 @@ class SDAT_INFO:
         pos = f.tell()
         f.seek(offset)
         entry_count = f.read_UInt32()
-        entry_offsets = [f.read_UInt32() for _ in range(entry_count)]
+        entry_offsets = f.read_UInt32_array(entry_count).tolist()
         entries = []
         for offset in entry_offsets:
             if offset != 0:
@@ -166,42 +151,27 @@ class SDAT_INFO:
 
 class SSEQ_INFO:
     def __init__(self, f: EndianBinaryReader):
-        self.id = f.read_UInt16()
-        self.unk = f.read_UInt16()
-        self.bank = f.read_UInt16()
-        self.volume = f.read_UInt8()
-        self.channel_pressure = f.read_UInt8()
-        self.polyphonic_pressure = f.read_UInt8()
-        self.play = f.read_UInt16()
-        padding = f.read(1)
+        SSEQ_INFO_RECORD.read(f, self)
 
 
 class SSAR_INFO:
     def __init__(self, f: EndianBinaryReader):
-        self.id = f.read_UInt16()
-        self.unk = f.read_UInt16()
+        SSAR_INFO_RECORD.read(f, self)
 
 
 class SBNK_INFO:
     def __init__(self, f: EndianBinaryReader):
-        self.id = f.read_UInt16()
-        self.unk = f.read_UInt16()
-        self.associated_swar1 = f.read_UInt16()
-        self.associated_swar2 = f.read_UInt16()
-        self.associated_swar3 = f.read_UInt16()
-        self.associated_swar4 = f.read_UInt16()
+        SBNK_INFO_RECORD.read(f, self)
 
 
 class SWAR_INFO:
     def __init__(self, f: EndianBinaryReader):
-        self.id = f.read_UInt16()
-        self.unk = f.read_UInt16()
+        SWAR_INFO_RECORD.read(f, self)
 
 
 class PLAYER_INFO:
     def __init__(self, f: EndianBinaryReader):
-        self.unk1 = f.read_UInt32()
-        self.unk2 = f.read_UInt32()
+        PLAYER_INFO_RECORD.read(f, self)
 
 
 class STRM_INFO:
@@ -227,9 +197,7 @@ class SDAT_FAT:
 
     def __init__(self, f: EndianBinaryReader):
         self.start_offset = f.tell()
-        self.magic = f.check_magic(b"FAT ")
-        self.section_size = f.read_UInt32()
-        self.entry_count = f.read_UInt32()
+        SDAT_FAT_HEADER.read(f, self)
         self.entries = [FAT_Entry(f) for _ in range(self.entry_count)]
         for entry in self.entries:
             entry.read_data(f)
@@ -237,11 +205,62 @@ class SDAT_FAT:
 
 class FAT_Entry:
     def __init__(self, f: EndianBinaryReader):
-        self.data_offset = f.read_UInt32()
-        self.data_size = f.read_UInt32()
-        self.unk1 = f.read_UInt32()
-        self.unk2 = f.read_UInt32()
+        FAT_ENTRY_RECORD.read(f, self)
 
     def read_data(self, f: EndianBinaryReader):
+        # a copy, since the SDAT file can be mapped, and the mapping is closed once it is read
         f.seek(self.data_offset)
         self.data = f.read(self.data_size)
+
+
+SDAT_HEADER = Schema(
+    *NITRO_HEADER_FIELDS,
+    ("symb_offset", "UInt32"),
+    ("symb_size", "UInt32"),
+    ("info_offset", "UInt32"),
+    ("info_size", "UInt32"),
+    ("fat_offset", "UInt32"),
+    ("fat_size", "UInt32"),
+    ("data_offset", "UInt32"),
+    ("data_size", "UInt32"),
+    magic=b"SDAT",
+)
+
+SDAT_SYMB_HEADER = Schema(("section_size", "UInt32"), magic=b"SYMB")
+
+SDAT_INFO_HEADER = Schema(("section_size", "UInt32"), magic=b"INFO")
+
+SDAT_FAT_HEADER = Schema(("section_size", "UInt32"), ("entry_count", "UInt32"), magic=b"FAT ")
+
+SSEQ_INFO_RECORD = Schema(
+    ("id", "UInt16"),
+    ("unk", "UInt16"),
+    ("bank", "UInt16"),
+    ("volume", "UInt8"),
+    ("channel_pressure", "UInt8"),
+    ("polyphonic_pressure", "UInt8"),
+    ("play", "UInt16"),
+    (None, 1),
+)
+
+SSAR_INFO_RECORD = Schema(("id", "UInt16"), ("unk", "UInt16"))
+
+SBNK_INFO_RECORD = Schema(
+    ("id", "UInt16"),
+    ("unk", "UInt16"),
+    ("associated_swar1", "UInt16"),
+    ("associated_swar2", "UInt16"),
+    ("associated_swar3", "UInt16"),
+    ("associated_swar4", "UInt16"),
+)
+
+SWAR_INFO_RECORD = Schema(("id", "UInt16"), ("unk", "UInt16"))
+
+PLAYER_INFO_RECORD = Schema(("unk1", "UInt32"), ("unk2", "UInt32"))
+
+FAT_ENTRY_RECORD = Schema(
+    ("data_offset", "UInt32"),
+    ("data_size", "UInt32"),
+    ("unk1", "UInt32"),
+    ("unk2", "UInt32"),
+)
@@ -1,5 +1,5 @@
-from NitroTools.FileSystem import EndianBinaryReader, EndianBinaryFileWriter
-from NitroTools.FileResource.File import File
+from NitroTools.FileSystem import EndianBinaryReader, EndianBinaryFileWriter, Schema
+from NitroTools.FileResource.File import File, NITRO_HEADER_FIELDS
 from NitroTools.FileResource.Sound.ADPCM import decode_block
 
 from pathlib import Path
@@ -13,11 +13,7 @@ class SWAR(File):
     """
 
     def read(self, f: EndianBinaryReader):
-        self.magic = f.check_magic(b"SWAR")
-        self.unk = f.read_UInt32()
-        self.filesize = f.read_UInt32()
-        self.header_size = f.read_UInt16()
-        self.block = f.read_UInt16()
+        SWAR_HEADER.read(f, self)
         self.data = SWARDATA(f)
 
     def extract(self, out_dir):
@@ -29,11 +25,8 @@ class SWAR(File):
 
 class SWARDATA:
     def __init__(self, f: EndianBinaryReader):
-        f.check_magic(b"DATA")
-        self.size = f.read_Int32()
-        padding = f.read(0x20)
-        self.entry_count = f.read_Int32()
-        self.entry_offsets = [f.read_Int32() for _ in range(self.entry_count)]
+        SWAR_DATA_HEADER.read(f, self)
+        self.entry_offsets = f.read_Int32_array(self.entry_count).tolist()
         self.entry_size = []
         for i in range(self.entry_count - 1):
             self.entry_size.append(self.entry_offsets[i + 1] - self.entry_offsets[i])
@@ -51,12 +44,7 @@ class SWAREntry:
     data: bytes
 
     def __init__(self, f: EndianBinaryReader):
-        self.type = f.read_UInt8()
-        self.loop = f.read_UInt8()
-        self.samplerate = f.read_UInt16()
-        self.time = f.read_UInt16()
-        self.loop_offset = f.read_UInt16()
-        self.nonloop_size = f.read_UInt32()
+        SWAR_ENTRY_HEADER.read(f, self)
 
     def to_wav(self, out_filepath):
         if self.type == 0:  # PCM8
@@ -84,3 +72,29 @@ def write_pcm_wav(data: bytes, pcm: int, samplerate: int, filepath: str):
         f.write(b"data")
         f.write_Int32(len(data))
         f.write(data)
+
+
+# the section count of the Nitro header is named block here
+SWAR_HEADER = Schema(
+    ("unk", "UInt32"),
+    ("filesize", "UInt32"),
+    ("header_size", "UInt16"),
+    ("block", "UInt16"),
+    magic=b"SWAR",
+)
+
+SWAR_DATA_HEADER = Schema(
+    ("size", "Int32"),
+    (None, 0x20),
+    ("entry_count", "Int32"),
+    magic=b"DATA",
+)
+
+SWAR_ENTRY_HEADER = Schema(
+    ("type", "UInt8"),
+    ("loop", "UInt8"),
+    ("samplerate", "UInt16"),
+    ("time", "UInt16"),
+    ("loop_offset", "UInt16"),
+    ("nonloop_size", "UInt32"),
+)
@@ -1,5 +1,5 @@
-from NitroTools.FileSystem import EndianBinaryReader
-from NitroTools.FileResource.File import File
+from NitroTools.FileSystem import EndianBinaryReader, Schema
+from NitroTools.FileResource.File import File, NITRO_HEADER_FIELDS
 from NitroTools.FileResource.Graphics import ImageCanva, RawBitmap, RawPalette
 from NitroTools.FileResource.Common import texel_decompress
 
@@ -9,15 +9,10 @@ import os
 
 class NSBMD(File):
     def read(self, f: EndianBinaryReader):
-        self.magic = f.check_magic(b"BMD0")
-        self.unk = f.read_UInt32()
-        self.filesize = f.read_UInt32()
-        self.header_size = f.read_UInt16()
-        self.section_count = f.read_UInt16()
+        NSBMD_HEADER.read(f, self)
         assert (
             self.section_count <= 2
         ), f"Unsupported section count for NSBMD: {self.section_count}, expected 2 or less"
-        self.mdl_offset = f.read_UInt32()
         if self.section_count == 2:
             self.tex_offset = f.read_UInt32()
         f.seek(self.mdl_offset)
@@ -40,23 +35,9 @@ class MDL0:
 class TEX0:
     def __init__(self, f: EndianBinaryReader):
         self.offset = f.tell()
-        self.magic = f.check_magic(b"TEX0")
-        self.section_size = f.read_UInt32()
-        self.padding1 = f.read_UInt32()
-        self.tex_region_size = f.read_UInt16()
-        self.tex_info_offset = f.read_UInt16()
-        self.padding2 = f.read_UInt32()
-        self.tex_data_offset = f.read_UInt32()
-        self.padding3 = f.read_UInt32()
-        self.tex_compressed_region_size = f.read_UInt16() << 3
-        self.tex_compressed_info_offset = f.read_UInt16()
-        self.padding4 = f.read_UInt32()
-        self.tex_compressed_data_offset = f.read_UInt32()
-        self.tex_compressed_info_data_offset = f.read_UInt32()
-        self.padding5 = f.read_UInt32()
-        self.palette_data_size = f.read_UInt32() << 3
-        self.palette_info_offset = f.read_UInt32()
-        self.palette_data_offset = f.read_UInt32()
+        TEX0_HEADER.read(f, self)
+        self.tex_compressed_region_size <<= 3
+        self.palette_data_size <<= 3
 
         f.seek(self.offset + self.tex_info_offset)
         self.tex_info = TexInfo(f)
@@ -146,15 +127,9 @@ class TEX0:
 
 class TexInfo:
     def __init__(self, f: EndianBinaryReader):
-        self.unk = f.read_UInt8()
-        self.tex_count = f.read_UInt8()
-        self.section_size = f.read_UInt16()
-
-        self.unk_header_size = f.read_UInt16()  # 8
-        self.unk_section_size = f.read_UInt16()
-        self.constant = f.read_UInt32()
-        self.unk1 = [f.read_UInt16() for _ in range(self.tex_count)]
-        self.unk2 = [f.read_UInt16() for _ in range(self.tex_count)]
+        TEX_INFO_HEADER.read(f, self)
+        self.unk1 = f.read_UInt16_array(self.tex_count).tolist()
+        self.unk2 = f.read_UInt16_array(self.tex_count).tolist()
 
         self.info_header_size = f.read_UInt16()  # 8? Should be 4?
         self.info_section_size = f.read_UInt16()
@@ -169,12 +144,7 @@ class TexParameters:
     compression_info_data: bytes
 
     def __init__(self, f: EndianBinaryReader):
-        self.tex_offset = f.read_UInt16()
-        self.parameters = f.read_UInt16()
-        self.width2 = f.read_UInt8()
-        self.unk1 = f.read_UInt8()
-        self.unk2 = f.read_UInt8()
-        self.unk3 = f.read_UInt8()
+        TEX_PARAMETERS.read(f, self)
 
         self.coord_transform = self.parameters & 14
         self.color = (self.parameters >> 13) & 1
@@ -226,15 +196,9 @@ class TexParameters:
 
 class PaletteInfo:
     def __init__(self, f: EndianBinaryReader):
-        self.unk = f.read_UInt8()
-        self.pal_count = f.read_UInt8()
-        self.section_size = f.read_UInt16()
-
-        self.unk_header_size = f.read_UInt16()  # 8
-        self.unk_section_size = f.read_UInt16()
-        self.constant = f.read_UInt32()
-        self.unk1 = [f.read_UInt16() for _ in range(self.pal_count)]
-        self.unk2 = [f.read_UInt16() for _ in range(self.pal_count)]
+        PALETTE_INFO_HEADER.read(f, self)
+        self.unk1 = f.read_UInt16_array(self.pal_count).tolist()
+        self.unk2 = f.read_UInt16_array(self.pal_count).tolist()
 
         self.info_header_size = f.read_UInt16()  # 8
         self.info_section_size = f.read_UInt16()
@@ -245,9 +209,60 @@ class PaletteInfo:
 
 class PaletteParameters:
     def __init__(self, f: EndianBinaryReader):
-        self.pal_offset = f.read_UInt16() & 0x1FFF
-        self.padding = f.read_UInt16()
-
+        PALETTE_PARAMETERS.read(f, self)
+        self.pal_offset &= 0x1FFF
+
+
+NSBMD_HEADER = Schema(*NITRO_HEADER_FIELDS, ("mdl_offset", "UInt32"), magic=b"BMD0")
+
+TEX0_HEADER = Schema(
+    ("section_size", "UInt32"),
+    ("padding1", "UInt32"),
+    ("tex_region_size", "UInt16"),
+    ("tex_info_offset", "UInt16"),
+    ("padding2", "UInt32"),
+    ("tex_data_offset", "UInt32"),
+    ("padding3", "UInt32"),
+    ("tex_compressed_region_size", "UInt16"),
+    ("tex_compressed_info_offset", "UInt16"),
+    ("padding4", "UInt32"),
+    ("tex_compressed_data_offset", "UInt32"),
+    ("tex_compressed_info_data_offset", "UInt32"),
+    ("padding5", "UInt32"),
+    ("palette_data_size", "UInt32"),
+    ("palette_info_offset", "UInt32"),
+    ("palette_data_offset", "UInt32"),
+    magic=b"TEX0",
+)
+
+TEX_INFO_HEADER = Schema(
+    ("unk", "UInt8"),
+    ("tex_count", "UInt8"),
+    ("section_size", "UInt16"),
+    ("unk_header_size", "UInt16"),  # 8
+    ("unk_section_size", "UInt16"),
+    ("constant", "UInt32"),
+)
+
+PALETTE_INFO_HEADER = Schema(
+    ("unk", "UInt8"),
+    ("pal_count", "UInt8"),
+    ("section_size", "UInt16"),
+    ("unk_header_size", "UInt16"),  # 8
+    ("unk_section_size", "UInt16"),
+    ("constant", "UInt32"),
+)
+
+TEX_PARAMETERS = Schema(
+    ("tex_offset", "UInt16"),
+    ("parameters", "UInt16"),
+    ("width2", "UInt8"),
+    ("unk1", "UInt8"),
+    ("unk2", "UInt8"),
+    ("unk3", "UInt8"),
+)
+
+PALETTE_PARAMETERS = Schema(("pal_offset", "UInt16"), ("padding", "UInt16"))
 
 FORMAT_PALETTE_SIZE = {
     0: 0,
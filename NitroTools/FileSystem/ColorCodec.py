@@ -0,0 +1,94 @@
+"""
+Conversion between the BGR555 colors of the Nintendo DS (5 bits per component, red in the low bits)
+and 8 bits RGB components, through lookup tables.
+
+A whole palette is converted at once: each component only depends on the low or the high byte of
+its color (green is split between them), so bytes.translate gives a component for all the colors.
+"""
+
+# The 8 bits value of each 5 bits component, and the other way around
+COLOR_5_TO_8 = bytes(round(value * 255 / 31) for value in range(32))
+COLOR_8_TO_5 = bytes(round(value * 31 / 255) for value in range(256))
+
+# From the bytes of the colors to the components
+RED_FROM_LOW = bytes(COLOR_5_TO_8[byte & 0x1F] for byte in range(256))
+GREEN_FROM_LOW = bytes(byte >> 5 for byte in range(256))
+GREEN_FROM_HIGH = bytes((byte & 0b11) << 3 for byte in range(256))
+GREEN_5_TO_8 = COLOR_5_TO_8 + bytes(256 - 32)
+BLUE_FROM_HIGH = bytes(COLOR_5_TO_8[(byte >> 2) & 0x1F] for byte in range(256))
+
+# From the components to the bytes of the colors
+LOW_FROM_RED = COLOR_8_TO_5
+LOW_FROM_GREEN = bytes((COLOR_8_TO_5[value] & 0b111) << 5 for value in range(256))
+HIGH_FROM_GREEN = bytes(COLOR_8_TO_5[value] >> 3 for value in range(256))
+HIGH_FROM_BLUE = bytes(COLOR_8_TO_5[value] << 2 for value in range(256))
+
+
+def decode_palette_color(value: int) -> list[int]:
+    """
+    Converts a BGR555 color to a list [red, green, blue] of 8 bits components.
+    """
+    return [
+        COLOR_5_TO_8[value & 0x1F],
+        COLOR_5_TO_8[(value >> 5) & 0x1F],
+        COLOR_5_TO_8[(value >> 10) & 0x1F],
+    ]
+
+
+def encode_palette_color(color: list[int]) -> int:
+    """
+    Converts 8 bits [red, green, blue] components to a BGR555 color.
+    """
+    return (
+        COLOR_8_TO_5[color[0]]
+        | (COLOR_8_TO_5[color[1]] << 5)
+        | (COLOR_8_TO_5[color[2]] << 10)
+    )
+
+
+def or_bytes(data1: bytes, data2: bytes) -> bytes:
+    # the bytes never overlap, so one big integer or gives all of them
+    return (int.from_bytes(data1, "little") | int.from_bytes(data2, "little")).to_bytes(
+        len(data1), "little"
+    )
+
+
+def decode_palette(data: bytes) -> bytes:
+    """
+    Converts little endian BGR555 colors to 8 bits components.
+
+    :params data: The colors, 2 bytes each. A trailing odd byte is ignored.
+
+    :returns: The components, stored in the following way: [R1, G1, B1, R2, G2, B2, ...].
+    """
+    count = len(data) // 2
+    low = bytes(data[0 : 2 * count : 2])
+    high = bytes(data[1 : 2 * count : 2])
+    green = or_bytes(low.translate(GREEN_FROM_LOW), high.translate(GREEN_FROM_HIGH))
+
+    out = bytearray(3 * count)
+    out[0::3] = low.translate(RED_FROM_LOW)
+    out[1::3] = green.translate(GREEN_5_TO_8)
+    out[2::3] = high.translate(BLUE_FROM_HIGH)
+    return bytes(out)
+
+
+def encode_palette(colors: bytes | list[int]) -> bytes:
+    """
+    Converts 8 bits components to little endian BGR555 colors, the reverse of decode_palette.
+
+    :params colors: The components, stored in the following way: [R1, G1, B1, R2, G2, B2, ...].
+        An incomplete color at the end is ignored.
+
+    :returns: The colors, 2 bytes each.
+    """
+    count = len(colors) // 3
+    components = bytes(colors[: 3 * count])
+    red = components[0::3]
+    green = components[1::3]
+    blue = components[2::3]
+
+    out = bytearray(2 * count)
+    out[0::2] = or_bytes(red.translate(LOW_FROM_RED), green.translate(LOW_FROM_GREEN))
+    out[1::2] = or_bytes(green.translate(HIGH_FROM_GREEN), blue.translate(HIGH_FROM_BLUE))
+    return bytes(out)
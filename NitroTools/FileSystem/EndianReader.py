@@ -1,5 +1,31 @@
+import mmap
 import struct
-from io import BytesIO
+import sys
+from array import array
+
+from NitroTools.FileSystem.ColorCodec import decode_palette_color
+
+
+# The struct format of each integer type, compiled once for each endianness
+STRUCT_FORMATS = {
+    "Int8": "b",
+    "UInt8": "B",
+    "Int16": "h",
+    "UInt16": "H",
+    "Int32": "i",
+    "UInt32": "I",
+    "Int64": "q",
+    "UInt64": "Q",
+}
+STRUCTS = {
+    endian_flag: {
+        name: struct.Struct(endian_flag + fmt) for name, fmt in STRUCT_FORMATS.items()
+    }
+    for endian_flag in "<>"
+}
+
+# The arrays returned by the read_*_array methods are in the byte order of the machine
+NATIVE_ENDIAN_FLAG = "<" if sys.byteorder == "little" else ">"
 
 
 class EndianBinaryReader:
@@ -20,30 +46,44 @@ class EndianBinaryReader:
             self.endian_flag = ">"
         else:
             raise Exception(r"Unknown endianness : should be 'little' or 'big'")
+        self.structs = STRUCTS[self.endian_flag]
 
     def read_Int8(self) -> int:
-        return struct.unpack(f"{self.endian_flag}b", self.read(1))[0]
+        return self.structs["Int8"].unpack(self.read(1))[0]
 
     def read_UInt8(self) -> int:
-        return struct.unpack(f"{self.endian_flag}B", self.read(1))[0]
+        return self.structs["UInt8"].unpack(self.read(1))[0]
 
     def read_Int16(self) -> int:
-        return struct.unpack(f"{self.endian_flag}h", self.read(2))[0]
+        return self.structs["Int16"].unpack(self.read(2))[0]
 
     def read_UInt16(self) -> int:
-        return struct.unpack(f"{self.endian_flag}H", self.read(2))[0]
+        return self.structs["UInt16"].unpack(self.read(2))[0]
 
     def read_Int32(self) -> int:
-        return struct.unpack(f"{self.endian_flag}i", self.read(4))[0]
+        return self.structs["Int32"].unpack(self.read(4))[0]
 
     def read_UInt32(self) -> int:
-        return struct.unpack(f"{self.endian_flag}I", self.read(4))[0]
+        return self.structs["UInt32"].unpack(self.read(4))[0]
 
     def read_Int64(self) -> int:
-        return struct.unpack(f"{self.endian_flag}q", self.read(8))[0]
+        return self.structs["Int64"].unpack(self.read(8))[0]
 
     def read_UInt64(self) -> int:
-        return struct.unpack(f"{self.endian_flag}Q", self.read(8))[0]
+        return self.structs["UInt64"].unpack(self.read(8))[0]
+
+    def read_struct(self, record: struct.Struct) -> tuple:
+        """
+        Read and unpack a record at once (see Schema).
+        """
+        return record.unpack(self.read(record.size))
+
+    def read_view(self, size: int = -1):
+        """
+        Read size bytes (all the remaining ones if negative). Readers over a buffer return a view
+        of it, the others a copy.
+        """
+        return self.read(size)
 
     def check_magic(self, magic):
         check = self.read(4)
@@ -67,16 +107,53 @@ class EndianBinaryReader:
             self.read(alignment - mod)
 
     def read_palette_color(self):
-        value = self.read_UInt16()
-        r = value & 0b11111
-        g = (value >> 5) & 0b11111
-        b = (value >> 10) & 0b11111
+        return decode_palette_color(self.read_UInt16())
+
+    def read_array(self, name: str, count: int) -> array:
+        """
+        Read count integers of the same type at once.
+
+        :params name: The name of the type, as in the read_* methods (e.g. "UInt16").
+        :params count: The number of integers.
+
+        :returns: An array of the integers, with the typecode struct uses for this type.
+        """
+        values = array(STRUCT_FORMATS[name])
+        size = count * values.itemsize
+        self.fill_array(values, size)
+        if self.endian_flag != NATIVE_ENDIAN_FLAG:
+            values.byteswap()
+        return values
+
+    def fill_array(self, values: array, size: int):
+        data = self.read(size)
+        if len(data) != size:
+            raise struct.error(f"Expected {size} bytes to read an array, got {len(data)}")
+        values.frombytes(data)
+
+    def read_Int8_array(self, count: int) -> array:
+        return self.read_array("Int8", count)
+
+    def read_UInt8_array(self, count: int) -> array:
+        return self.read_array("UInt8", count)
+
+    def read_Int16_array(self, count: int) -> array:
+        return self.read_array("Int16", count)
+
+    def read_UInt16_array(self, count: int) -> array:
+        return self.read_array("UInt16", count)
+
+    def read_Int32_array(self, count: int) -> array:
+        return self.read_array("Int32", count)
 
-        red = round(r * 255 / 31)
-        green = round(g * 255 / 31)
-        blue = round(b * 255 / 31)
+    def read_UInt32_array(self, count: int) -> array:
+        return self.read_array("UInt32", count)
 
-        return [red, green, blue]
+    def read_Int64_array(self, count: int) -> array:
+        return self.read_array("Int64", count)
+
+    def read_UInt64_array(self, count: int) -> array:
+        return self.read_array("UInt64", count)
 
 
 class EndianBinaryFileReader(EndianBinaryReader):
@@ -96,10 +173,147 @@ class EndianBinaryFileReader(EndianBinaryReader):
 
 
 class EndianBinaryStreamReader(EndianBinaryReader):
+    """
+    Reader over a buffer in memory. The buffer isn't copied: the reader keeps a memoryview of it
+    and a cursor, integers are unpacked from the view directly, and read_view returns slices of
+    the buffer. read still returns bytes, as the other readers do.
+
+    :params stream: A bytes-like object.
+    """
+
     def __init__(self, stream: bytes, endianness: str = "little"):
         self.set_endianness(endianness)
-        self.stream = BytesIO(stream)
-        self.read = self.stream.read
-        self.tell = self.stream.tell
-        self.seek = self.stream.seek
-        self.getvalue = self.stream.getvalue
+        self.view = memoryview(stream).cast("B")
+        self.pos = 0
+
+    def tell(self) -> int:
+        return self.pos
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        if offset < 0 and whence == 0:
+            raise ValueError(f"Negative seek position {offset}")
+        if whence == 1:
+            offset = max(offset + self.pos, 0)
+        elif whence == 2:
+            offset = max(offset + len(self.view), 0)
+        self.pos = offset
+        return offset
+
+    def read_view(self, size: int = -1) -> memoryview:
+        """
+        Read size bytes (all the remaining ones if negative), as a view of the buffer.
+        """
+        start = self.pos
+        if size is None or size < 0:
+            self.pos = max(len(self.view), start)
+        else:
+            self.pos = min(start + size, max(len(self.view), start))
+        return self.view[start : self.pos]
+
+    def read(self, size: int = -1) -> bytes:
+        return self.read_view(size).tobytes()
+
+    def getvalue(self) -> bytes:
+        return self.view.tobytes()
+
+    def read_struct(self, record: struct.Struct) -> tuple:
+        values = record.unpack_from(self.view, self.pos)
+        self.pos += record.size
+        return values
+
+    def fill_array(self, values: array, size: int):
+        # straight from the buffer, without an intermediate bytes object
+        if self.pos + size > len(self.view):
+            raise struct.error(
+                f"Expected {size} bytes to read an array, got {max(len(self.view) - self.pos, 0)}"
+            )
+        values.frombytes(self.view[self.pos : self.pos + size])
+        self.pos += size
+
+    def read_Int8(self) -> int:
+        value = self.structs["Int8"].unpack_from(self.view, self.pos)[0]
+        self.pos += 1
+        return value
+
+    def read_UInt8(self) -> int:
+        value = self.structs["UInt8"].unpack_from(self.view, self.pos)[0]
+        self.pos += 1
+        return value
+
+    def read_Int16(self) -> int:
+        value = self.structs["Int16"].unpack_from(self.view, self.pos)[0]
+        self.pos += 2
+        return value
+
+    def read_UInt16(self) -> int:
+        value = self.structs["UInt16"].unpack_from(self.view, self.pos)[0]
+        self.pos += 2
+        return value
+
+    def read_Int32(self) -> int:
+        value = self.structs["Int32"].unpack_from(self.view, self.pos)[0]
+        self.pos += 4
+        return value
+
+    def read_UInt32(self) -> int:
+        value = self.structs["UInt32"].unpack_from(self.view, self.pos)[0]
+        self.pos += 4
+        return value
+
+    def read_Int64(self) -> int:
+        value = self.structs["Int64"].unpack_from(self.view, self.pos)[0]
+        self.pos += 8
+        return value
+
+    def read_UInt64(self) -> int:
+        value = self.structs["UInt64"].unpack_from(self.view, self.pos)[0]
+        self.pos += 8
+        return value
+
+    def read_string_until_null(self) -> bytes:
+        # the terminator is searched in small chunks, since strings are short
+        start = self.pos
+        end = start
+        while end < len(self.view):
+            idx = self.view[end : end + 0x40].tobytes().find(b"\x00")
+            if idx >= 0:
+                self.pos = end + idx + 1
+                return self.view[start : end + idx].tobytes()
+            end += 0x40
+        raise Exception("Missing null terminator")
+
+
+class EndianBinaryMappedReader(EndianBinaryStreamReader):
+    """
+    Reader over a memory-mapped file: only the pages that are read are loaded, and read_view
+    returns views of the mapping.
+
+    The file must not be modified while it is mapped, so the mapping should be closed once the
+    file is read (see close). Anything kept after that must be copied out of the views.
+    """
+
+    def __init__(self, filepath: str, endianness: str = "little"):
+        self.filepath = filepath
+        with open(filepath, mode="rb") as file:
+            try:
+                self.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # an empty file can't be mapped
+                self.mmap = b""
+        super().__init__(self.mmap, endianness)
+
+    def close(self):
+        """
+        Release the view of the reader and close the mapping. The views returned by read_view
+        must be released first, otherwise a BufferError is raised.
+        """
+        self.view.release()
+        if isinstance(self.mmap, mmap.mmap):
+            self.mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # after an error, the traceback can still hold views: the mapping is left to them
+        if exc_type is None:
+            self.close()
@@ -1,6 +1,9 @@
 import struct
 from io import BytesIO
 
+from NitroTools.FileSystem.EndianReader import STRUCTS
+from NitroTools.FileSystem.ColorCodec import encode_palette_color
+
 
 class EndianBinaryWriter:
     def __init__(
@@ -45,18 +48,34 @@ class EndianBinaryWriter:
     def write_UInt64(self, value: int):
         self.write(struct.pack(f"{self.endian_flag}Q", value))
 
+    def reserve(self, name: str = "UInt32") -> int:
+        """
+        Write a zero placeholder for a field whose value isn't known yet, like the size of a section.
+
+        :params name: The name of the type of the field (e.g. "UInt32").
+
+        :returns: The offset of the field, to give to patch.
+        """
+        offset = self.tell()
+        self.write(bytes(STRUCTS[self.endian_flag][name].size))
+        return offset
+
+    def patch(self, offset: int, value: int, name: str = "UInt32"):
+        """
+        Overwrite the field at the given offset, without moving the position.
+        """
+        pos = self.tell()
+        self.seek(offset)
+        self.write(STRUCTS[self.endian_flag][name].pack(value))
+        self.seek(pos)
+
     def pad(self, alignment: int):
         mod = self.tell() % alignment
         if mod != 0:
             self.write(bytes(alignment - mod))
 
     def write_palette_color(self, color: list[int]):
-        red, green, blue = color[0], color[1], color[2]
-        r = round(red * 31 / 255)
-        g = round(green * 31 / 255)
-        b = round(blue * 31 / 255)
-        data = r + (g << 5) + (b << 10)
-        self.write_UInt16(data)
+        self.write_UInt16(encode_palette_color(color))
 
 
 class EndianBinaryFileWriter(EndianBinaryWriter):
@@ -83,3 +102,8 @@ class EndianBinaryStreamWriter(EndianBinaryWriter):
         self.tell = self.stream.tell
         self.seek = self.stream.seek
         self.getvalue = self.stream.getvalue
+
+    def patch(self, offset: int, value: int, name: str = "UInt32"):
+        # in the buffer of the stream, which must be released before the next write
+        with self.stream.getbuffer() as view:
+            STRUCTS[self.endian_flag][name].pack_into(view, offset, value)
@@ -0,0 +1,80 @@
+import struct
+
+from NitroTools.FileSystem.EndianReader import STRUCT_FORMATS
+
+
+class Schema:
+    """
+    A record made of fixed size fields, compiled into one struct.Struct for each endianness.
+    The whole record is read with one unpack and written with one pack, instead of one
+    read_* or write_* call per field.
+
+    :params fields: (name, type) tuples, in the order of the record. The type is either the name
+        of an integer type, as in the read_* methods (e.g. "UInt16"), or a number of bytes.
+        A number of bytes named None is padding: it is skipped on read, and written as zeros.
+    :params magic: If given, the record starts with these 4 bytes, which are checked on read.
+    """
+
+    def __init__(self, *fields: tuple[str, str | int], magic: bytes = None):
+        self.magic = magic
+        self.names = []
+        fmt = "4s" if magic is not None else ""
+        for name, kind in fields:
+            if name is None:
+                assert isinstance(kind, int), "Only padding fields can be unnamed"
+                fmt += f"{kind}x"
+                continue
+            self.names.append(name)
+            fmt += f"{kind}s" if isinstance(kind, int) else STRUCT_FORMATS[kind]
+        self.structs = {flag: struct.Struct(flag + fmt) for flag in "<>"}
+        self.size = self.structs["<"].size
+
+    def unpack(self, f) -> tuple:
+        """
+        Read the record from the reader f.
+
+        :returns: The values of the named fields, in order.
+        """
+        values = f.read_struct(self.structs[f.endian_flag])
+        if self.magic is None:
+            return values
+        if values[0] != self.magic:
+            raise Exception(
+                f"Error: Invalid magic. Expected {str(self.magic)}, read {str(values[0])}"
+            )
+        return values[1:]
+
+    def read(self, f, obj) -> None:
+        """
+        Read the record from the reader f, and set each field as an attribute of obj,
+        as well as the magic if there is one.
+        """
+        for name, value in zip(self.names, self.unpack(f)):
+            setattr(obj, name, value)
+        if self.magic is not None:
+            obj.magic = self.magic
+
+    def pack(self, obj=None, endian_flag: str = "<", **values) -> bytes:
+        """
+        Returns the record as bytes. The value of each field is taken from the keyword arguments,
+        or else from the attribute of obj with the same name.
+        """
+        return self.structs[endian_flag].pack(*self.values(obj, values))
+
+    def pack_into(self, buffer, offset: int, obj=None, endian_flag: str = "<", **values) -> None:
+        """
+        Writes the record into buffer at the given offset, like pack.
+        """
+        self.structs[endian_flag].pack_into(buffer, offset, *self.values(obj, values))
+
+    def write(self, f, obj=None, **values) -> None:
+        """
+        Write the record to the writer f, like pack.
+        """
+        f.write(self.pack(obj, f.endian_flag, **values))
+
+    def values(self, obj, values: dict) -> list:
+        out = [] if self.magic is None else [self.magic]
+        for name in self.names:
+            out.append(values[name] if name in values else getattr(obj, name))
+        return out
@@ -1,6 +1,7 @@
 from NitroTools.FileSystem.EndianReader import (
     EndianBinaryFileReader,
     EndianBinaryStreamReader,
+    EndianBinaryMappedReader,
     EndianBinaryReader,
 )
 from NitroTools.FileSystem.EndianWriter import (
@@ -8,3 +9,10 @@ from NitroTools.FileSystem.EndianWriter import (
     EndianBinaryStreamWriter,
     EndianBinaryWriter,
 )
+from NitroTools.FileSystem.Schema import Schema
+from NitroTools.FileSystem.ColorCodec import (
+    decode_palette,
+    encode_palette,
+    decode_palette_color,
+    encode_palette_color,
+)
@@ -0,0 +1,102 @@
+"""
+Compare the table based bpp converters of Common/utils with the previous per pixel ones,
+on the pixels of a square image. Both must produce identical output.
+
+usage: python benchmarks/bench_bpp.py [image_side]
+"""
+
+import random
+import struct
+import sys
+import time
+
+import NitroTools.FileResource.Graphics  # Common can't be imported first
+from NitroTools.FileResource.Common import convert_from_eightbpp, convert_to_eightbpp
+
+
+def legacy_eightbpp_to_fourbpp(data: bytes | bytearray):
+    newdata = bytearray()
+    it = iter(data)
+    for _ in range(len(data) // 2):
+        val1 = next(it) % 0x10
+        val2 = next(it) % 0x10
+        newdata += struct.pack("<B", val2 * 0x10 + val1)
+    return newdata
+
+
+def legacy_fourbpp_to_eightbpp(data: bytes | bytearray, pal_idx: int = 0):
+    newdata = bytearray()
+    for val in data:
+        p1 = (val % 0x10) + (0x10 * pal_idx)
+        p2 = (val // 0x10) + (0x10 * pal_idx)
+        newdata += struct.pack("<B", p1) + struct.pack("<B", p2)
+    return newdata
+
+
+def legacy_eightbpp_to_twobpp(data: bytes | bytearray):
+    newdata = bytearray()
+    it = iter(data)
+    for _ in range(len(data) // 4):
+        val1 = next(it) % 0x4
+        val2 = next(it) % 0x4
+        val3 = next(it) % 0x4
+        val4 = next(it) % 0x4
+        newdata += struct.pack("<B", (val4 << 6) + (val3 << 4) + (val2 << 2) + val1)
+    return newdata
+
+
+def legacy_twobpp_to_eightbpp(data: bytes | bytearray, pal_idx: int = 0):
+    # with the 2 bits mask, the previous one (0x4) didn't give the right pixels
+    newdata = bytearray()
+    for val in data:
+        p1 = (val & 0x3) + (0x4 * pal_idx)
+        p2 = ((val >> 2) & 0x3) + (0x4 * pal_idx)
+        p3 = ((val >> 4) & 0x3) + (0x4 * pal_idx)
+        p4 = ((val >> 6) & 0x3) + (0x4 * pal_idx)
+        newdata += (
+            struct.pack("<B", p1)
+            + struct.pack("<B", p2)
+            + struct.pack("<B", p3)
+            + struct.pack("<B", p4)
+        )
+    return newdata
+
+
+LEGACY = {
+    4: (legacy_eightbpp_to_fourbpp, legacy_fourbpp_to_eightbpp),
+    2: (legacy_eightbpp_to_twobpp, legacy_twobpp_to_eightbpp),
+}
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    out = func(*args)
+    return out, time.perf_counter() - start
+
+
+def main():
+    side = int(sys.argv[1]) if len(sys.argv) > 1 else 512
+    rng = random.Random(0)
+    print(f"input: {side}x{side} pixels")
+    for bit_depth in (4, 2, 1):
+        pixels = bytes(rng.randrange(1 << bit_depth) for _ in range(side * side))
+        packed, pack_time = timed(convert_from_eightbpp, pixels, bit_depth)
+        unpacked, unpack_time = timed(convert_to_eightbpp, packed, bit_depth, 1)
+        assert convert_to_eightbpp(packed, bit_depth) == pixels, f"{bit_depth}bpp: bad round trip"
+        line = f"{bit_depth}bpp: pack {pack_time * 1000:.1f}ms, unpack {unpack_time * 1000:.1f}ms"
+
+        if bit_depth in LEGACY:
+            legacy_pack, legacy_unpack = LEGACY[bit_depth]
+            old_packed, old_pack_time = timed(legacy_pack, pixels)
+            old_unpacked, old_unpack_time = timed(legacy_unpack, packed, 1)
+            assert old_packed == packed, f"{bit_depth}bpp: packed pixels differ"
+            assert old_unpacked == unpacked, f"{bit_depth}bpp: unpacked pixels differ"
+            line += (
+                f" (per pixel: pack {old_pack_time * 1000:.1f}ms, {old_pack_time / pack_time:.0f}x;"
+                f" unpack {old_unpack_time * 1000:.1f}ms, {old_unpack_time / unpack_time:.0f}x)"
+            )
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Benchmark and round-trip check of every codec of the Compression package on generated
+corpora. For each codec and corpus, reports the compression ratio, the speed of the
+compression and of the decompression, and their peak memory (measured with tracemalloc,
+in a separate run so it doesn't slow down the timed ones).
+
+The results can be saved as JSON, and compared with a previous run to spot regressions.
+
+usage: python benchmarks/bench_compression.py [--size N] [--repeat N]
+           [--codecs lz10,lz11,...] [--output results.json] [--baseline old.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from NitroTools.Compression import compress, decompress, probe, check_limits, COMPRESSION_CODES
+from NitroTools.Compression.probe import MAX_RATIOS
+from NitroTools.FileResource.Graphics.Bitmap.RawBitmap import RawBitmap
+
+from bench_lz_matchfinder import generate_tiles
+from bench_lz_levels import generate_text
+
+
+def generate_random(size: int, seed: int = 0) -> bytes:
+    return random.Random(seed).randbytes(size)
+
+
+def generate_repetitive(size: int, seed: int = 0) -> bytes:
+    """Long runs of a few byte values, and a short pattern repeated over and over."""
+    rng = random.Random(seed)
+    pattern = bytes(rng.randrange(4) for _ in range(12))
+    data = bytearray()
+    while len(data) < size:
+        if rng.random() < 0.5:
+            data += bytes([rng.choice(b"\x00\xff\x11")]) * rng.randint(16, 600)
+        else:
+            data += pattern * rng.randint(2, 40)
+    return bytes(data[:size])
+
+
+CORPORA = {
+    "random": generate_random,
+    "repetitive": generate_repetitive,
+    "tiles": generate_tiles,
+    "text": generate_text,
+}
+
+
+def lz11_reference(length: int, disp: int) -> bytes:
+    """The 4 bytes reference of LZ11, for lengths from 0x111 to 0x10110."""
+    length -= 0x111
+    disp -= 1
+    return bytes(
+        [0x10 | (length >> 12), (length >> 4) & 0xFF, ((length & 0xF) << 4) | (disp >> 8), disp & 0xFF]
+    )
+
+
+def generate_max_ratio_lz11() -> bytes:
+    """
+    A valid LZ11 stream with the highest ratio of the format: a literal, then references of
+    0x10110 bytes (the longest) to it, up to 0xFFFFFF bytes (the biggest size).
+    """
+    size = 0xFFFFFF
+    lengths = [0x10110] * ((size - 1) // 0x10110) + [(size - 1) % 0x10110]
+    # the literal, then the references of each block, whose flag bits are set
+    tokens = [b"A"] + [lz11_reference(length, 1) for length in lengths]
+    body = bytearray()
+    for pos in range(0, len(tokens), 8):
+        block = tokens[pos : pos + 8]
+        flags = (0xFF << (8 - len(block))) & 0xFF
+        body.append(flags & 0x7F if pos == 0 else flags)
+        body += b"".join(block)
+    return b"\x11" + size.to_bytes(3, "little") + bytes(body)
+
+
+def check_limits_cases():
+    """
+    The limits must accept valid data at the highest ratio of its format.
+    """
+    data = generate_max_ratio_lz11()
+    if probe(data) != ("lz11", 0xFFFFFF):
+        raise AssertionError("lz11: the max ratio stream isn't detected")
+    check_limits(data, max_ratio=MAX_RATIOS["lz11"], trial_size=0x400)
+    if decompress(data)[0] != b"A" * 0xFFFFFF:
+        raise AssertionError("lz11: bad decompression of the max ratio stream")
+
+
+def check_file_inputs(data: bytes):
+    """
+    A compressed file must give the same data, whether it's opened by path (from a mapping),
+    from bytes, or from a memoryview.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        for code in COMPRESSION_CODES:
+            compressed = bytes(compress(data, code))
+            path = os.path.join(directory, code)
+            with open(path, mode="wb") as f:
+                f.write(compressed)
+            for inp in (path, compressed, memoryview(compressed)):
+                bitmap = RawBitmap(inp)
+                if bitmap.compression != code or bytes(bitmap.get_data()) != data:
+                    raise AssertionError(f"{code}: bad file read from {type(inp).__name__}")
+
+
+# A result is a regression when it's this much worse than the baseline
+SPEED_TOLERANCE = 0.8
+RATIO_TOLERANCE = 1.001
+
+
+def best_time(func, repeat: int):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def peak_memory(func) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench(code: str, data: bytes, repeat: int) -> dict:
+    compressed, compress_time = best_time(lambda: compress(data, code), repeat)
+    if not isinstance(compressed, (bytes, bytearray)):
+        raise AssertionError(f"{code}: compress returned {type(compressed).__name__}")
+    compressed = bytes(compressed)
+
+    (decompressed, decompressed_code), decompress_time = best_time(
+        lambda: decompress(compressed), repeat
+    )
+    if decompressed_code != code:
+        raise AssertionError(f"{code}: the output is detected as {decompressed_code}")
+    if decompressed != data:
+        raise AssertionError(f"{code}: bad round trip")
+
+    mb = len(data) / 1e6
+    return {
+        "size": len(data),
+        "compressed_size": len(compressed),
+        "ratio": len(compressed) / len(data),
+        "compress_mb_s": mb / compress_time,
+        "decompress_mb_s": mb / decompress_time,
+        "compress_peak_bytes": peak_memory(lambda: compress(data, code)),
+        "decompress_peak_bytes": peak_memory(lambda: decompress(compressed)),
+    }
+
+
+def compare(results: dict, baseline: dict) -> list[str]:
+    regressions = []
+    for key, result in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        if result["ratio"] > old["ratio"] * RATIO_TOLERANCE:
+            regressions.append(f"{key}: ratio {old['ratio']:.4f} -> {result['ratio']:.4f}")
+        for speed in ("compress_mb_s", "decompress_mb_s"):
+            if result[speed] < old[speed] * SPEED_TOLERANCE:
+                regressions.append(
+                    f"{key}: {speed} {old[speed]:.2f} -> {result[speed]:.2f}"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=64 * 1024, help="size of each corpus")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs, the best is kept")
+    parser.add_argument("--codecs", default=",".join(COMPRESSION_CODES))
+    parser.add_argument("--corpora", default=",".join(CORPORA))
+    parser.add_argument("--output", help="save the results to this JSON file")
+    parser.add_argument("--baseline", help="compare the results with this JSON file")
+    args = parser.parse_args()
+
+    check_limits_cases()
+    check_file_inputs(generate_text(0x1000))
+    results = {}
+    print(
+        f"{'codec':<6} {'corpus':<11} {'ratio':>7} {'comp MB/s':>10} {'dec MB/s':>9}"
+        f" {'comp peak':>10} {'dec peak':>9}"
+    )
+    for corpus in args.corpora.split(","):
+        data = CORPORA[corpus](args.size)
+        for code in args.codecs.split(","):
+            result = bench(code, data, args.repeat)
+            results[f"{code}/{corpus}"] = result
+            print(
+                f"{code:<6} {corpus:<11} {result['ratio']:>7.3f}"
+                f" {result['compress_mb_s']:>10.2f} {result['decompress_mb_s']:>9.2f}"
+                f" {result['compress_peak_bytes'] >> 10:>8}KB"
+                f" {result['decompress_peak_bytes'] >> 10:>7}KB"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {"python": platform.python_version(), "results": results}, f, indent=2
+            )
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f)["results"])
+        for regression in regressions:
+            print(f"regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
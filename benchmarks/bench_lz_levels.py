@@ -0,0 +1,47 @@
+"""
+Compare the output size and the compression time of the GREEDY, LAZY and OPTIMAL levels
+of the LZ10 and LZ11 compressors.
+
+usage: python benchmarks/bench_lz_levels.py [size_in_bytes]
+"""
+
+import random
+import sys
+import time
+
+from NitroTools.Compression import decompress
+from NitroTools.Compression.lz10 import compress_lz10
+from NitroTools.Compression.lz11 import compress_lz11
+from NitroTools.Compression.matchfinder import GREEDY, LAZY, OPTIMAL
+
+from bench_lz_matchfinder import generate_tiles
+
+
+def generate_text(size: int, seed: int = 0) -> bytes:
+    rng = random.Random(seed)
+    words = [
+        bytes(rng.choice(b"abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 9)))
+        for _ in range(300)
+    ]
+    data = bytearray()
+    while len(data) < size:
+        data += rng.choice(words) + rng.choice([b" ", b" ", b" ", b", ", b".\n"])
+    return bytes(data[:size])
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 256 * 1024
+    corpora = {"tiles": generate_tiles(size), "text": generate_text(size)}
+    for corpus, data in corpora.items():
+        print(f"{corpus}: {size} bytes")
+        for name, func in (("lz10", compress_lz10), ("lz11", compress_lz11)):
+            for level_name, level in (("greedy", GREEDY), ("lazy", LAZY), ("optimal", OPTIMAL)):
+                start = time.perf_counter()
+                out = func(data, level=level)
+                elapsed = time.perf_counter() - start
+                assert decompress(bytes(out))[0] == data, f"{name} {level_name}: bad round trip"
+                print(f"  {name} {level_name:>7}: {len(out):>8} bytes in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
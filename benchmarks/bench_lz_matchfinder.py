@@ -0,0 +1,53 @@
+"""
+Compare the legacy SlidingWindow match search with the bytes.find based MatchFinder
+used by compress_raw_lz10 / compress_raw_lz11. Both must produce identical output.
+
+usage: python benchmarks/bench_lz_matchfinder.py [size_in_bytes]
+"""
+
+import random
+import sys
+import time
+
+from NitroTools.Compression import lz10, lz11
+
+
+def generate_tiles(size: int, seed: int = 0) -> bytes:
+    """4bpp-like tile data: a small set of 32-byte tiles, repeated and slightly altered."""
+    rng = random.Random(seed)
+    tiles = [bytes(rng.choice(b"\x00\x11\x12\x21\x22\x33") for _ in range(32)) for _ in range(64)]
+    data = bytearray()
+    while len(data) < size:
+        tile = bytearray(rng.choice(tiles))
+        if rng.random() < 0.2:
+            tile[rng.randrange(32)] = rng.randrange(256)
+        data += tile
+    return bytes(data[:size])
+
+
+def bench(func, data, windowclass):
+    start = time.perf_counter()
+    out = func(data, windowclass)
+    return out, time.perf_counter() - start
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 64 * 1024
+    data = generate_tiles(size)
+    print(f"input: {size} bytes of tile-like data")
+    for name, module, legacy, fast in (
+        ("lz10", lz10, lz10.NLZ10Window, lz10.NLZ10MatchFinder),
+        ("lz11", lz11, lz11.NLZ11Window, lz11.NLZ11MatchFinder),
+    ):
+        func = getattr(module, f"compress_raw_{name}")
+        old, old_time = bench(func, data, legacy)
+        new, new_time = bench(func, data, fast)
+        assert old == new, f"{name}: output differs between the two match finders"
+        print(
+            f"{name}: {len(new)} bytes, SlidingWindow {old_time:.2f}s, "
+            f"MatchFinder {new_time:.2f}s ({old_time / new_time:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()